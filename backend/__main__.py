@@ -0,0 +1,6 @@
+"""Run the command-line interface: ``python -m backend``."""
+import sys
+
+from backend.cli import main
+
+sys.exit(main())
@@ -1,57 +1,107 @@
 """Main Flask application."""
-import sys
-from pathlib import Path
-
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+import os
+import threading
 
 from flask import Flask, send_from_directory
 from flask_cors import CORS
-from backend.routes import api
-import os
-
-app = Flask(__name__, static_folder=None)
-CORS(app)
-
-# Register API blueprints FIRST (important for routing priority)
-app.register_blueprint(api, url_prefix='/api')
 
-# Serve sound files from static/sounds
-@app.route('/static/sounds/<path:filename>')
-def serve_static_sound(filename):
-    """Serve sound files from static directory."""
-    return send_from_directory('../static/sounds', filename)
+from backend.compression import init_compression
+from backend.config import Config, PROJECT_ROOT
+from backend.database import Database
+from backend.maintenance import MaintenanceScheduler
+from backend.routes import api
+from backend.scheduler import TimeLimitScheduler
 
-# Serve sound files (legacy route)
-@app.route('/sounds/<path:filename>')
-def serve_sound(filename):
-    """Serve sound files."""
-    return send_from_directory('../static/sounds', filename)
+FRONTEND_DIR = PROJECT_ROOT / 'frontend'
 
-# Serve CSS files
-@app.route('/css/<path:filename>')
-def serve_css(filename):
-    """Serve CSS files."""
-    return send_from_directory('../frontend/css', filename)
 
-# Serve JS files
-@app.route('/js/<path:filename>')
-def serve_js(filename):
-    """Serve JS files."""
-    return send_from_directory('../frontend/js', filename)
+def create_app(config=None):
+    """Create and configure the Flask application.
+    
+    ``config`` is an optional mapping applied on top of :class:`Config`.
+    The database is only opened, and background threads only started,
+    when the first request arrives.
+    """
+    app = Flask(__name__, static_folder=None)
+    app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+    CORS(app)
+    init_compression(app)
+    
+    app.extensions['database'] = Database(
+        app.config['DATABASE'],
+        reader_pool_size=app.config['READER_POOL_SIZE'],
+        mmap_size=app.config['MMAP_SIZE']
+    )
+    scheduler = TimeLimitScheduler(app.extensions['database'])
+    app.extensions['scheduler'] = scheduler
+    
+    maintenance = MaintenanceScheduler(
+        app.extensions['database'],
+        schedule=app.config['MAINTENANCE_SCHEDULE'],
+        idle_seconds=app.config['MAINTENANCE_IDLE_SECONDS'],
+        wal_checkpoint_bytes=app.config['WAL_CHECKPOINT_BYTES'],
+        wal_truncate_bytes=app.config['WAL_TRUNCATE_BYTES']
+    )
+    app.extensions['maintenance'] = maintenance
+    app.before_request(maintenance.touch)
+    
+    # Background threads start with the first request, so only the process
+    # that serves requests runs them (not the debug reloader's watcher)
+    threads_started = threading.Lock()
+    
+    @app.before_request
+    def start_background_threads():
+        if not threads_started.acquire(blocking=False):
+            return
+        if app.config['SCHEDULER_ENABLED']:
+            scheduler.start()
+        if app.config['MAINTENANCE_ENABLED']:
+            maintenance.start()
+    
+    # Register API blueprints FIRST (important for routing priority)
+    app.register_blueprint(api, url_prefix='/api')
+    
+    # Serve sound files from static/sounds
+    @app.route('/static/sounds/<path:filename>')
+    def serve_static_sound(filename):
+        """Serve sound files from static directory."""
+        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    
+    # Serve sound files (legacy route)
+    @app.route('/sounds/<path:filename>')
+    def serve_sound(filename):
+        """Serve sound files."""
+        return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    
+    # Serve CSS files
+    @app.route('/css/<path:filename>')
+    def serve_css(filename):
+        """Serve CSS files."""
+        return send_from_directory(FRONTEND_DIR / 'css', filename)
+    
+    # Serve JS files
+    @app.route('/js/<path:filename>')
+    def serve_js(filename):
+        """Serve JS files."""
+        return send_from_directory(FRONTEND_DIR / 'js', filename)
+    
+    # Serve index.html for root only
+    @app.route('/')
+    def serve_index():
+        """Serve the main page."""
+        return send_from_directory(FRONTEND_DIR, 'index.html')
+    
+    return app
 
-# Serve index.html for root only
-@app.route('/')
-def serve_index():
-    """Serve the main page."""
-    return send_from_directory('../frontend', 'index.html')
 
 if __name__ == '__main__':
+    app = create_app()
+    
     # Ensure directories exist
-    os.makedirs('data', exist_ok=True)
-    os.makedirs('static/sounds', exist_ok=True)
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
     print("Starting Time Tracker application...")
     print("Open your browser and navigate to: http://localhost:5010")
     app.run(debug=True, host='0.0.0.0', port=5010)
-
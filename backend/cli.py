@@ -0,0 +1,242 @@
+"""Command-line interface built directly on the Database.
+
+Does not import Flask, so it starts quickly and works without the server.
+It can run next to a live server: the database is in WAL mode, starts and
+stops are single atomic statements and other writes wait on SQLite's busy
+timeout instead of failing.
+
+Examples:
+    python -m backend start "Writing"
+    python -m backend stop
+    python -m backend status
+    python -m backend report range 2024-01-01 2024-04-01
+    python -m backend export backup.jsonl
+    python -m backend import backup.jsonl
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+
+from backend import reports
+from backend.config import Config
+from backend.database import DEFAULT_ARCHIVE_AFTER_DAYS, Database
+
+
+def _print_json(data):
+    json.dump(data, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+
+
+def _find_task_id(db, task: str):
+    """Resolve a task given by id or exact name."""
+    if task.isdigit():
+        return int(task) if db.get_task(int(task)) else None
+    for candidate in db.get_all_tasks():
+        if candidate.name == task:
+            return candidate.id
+    return None
+
+
+def _parse_date(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date: {value}. Use YYYY-MM-DD")
+
+
+def cmd_start(db, args):
+    if args.is_break:
+        # Breaks are recorded against a placeholder task, like the web timer
+        task_id = 1
+    else:
+        task_id = _find_task_id(db, args.task) if args.task else None
+        if task_id is None:
+            print(f"Task not found: {args.task}", file=sys.stderr)
+            return 1
+
+    session = db.start_session(task_id, is_break=args.is_break)
+    if not session:
+        print("There is already an active session. Stop it first.", file=sys.stderr)
+        return 1
+    _print_json(session.to_dict())
+    return 0
+
+
+def cmd_stop(db, args):
+    session = db.stop_session(args.session_id)
+    if not session:
+        print("No active session found", file=sys.stderr)
+        return 1
+    _print_json(session.to_dict())
+    return 0
+
+
+def cmd_status(db, args):
+    session = db.get_active_session()
+    if not session:
+        _print_json(None)
+        return 0
+
+    status = session.to_dict()
+    status['elapsed'] = int((datetime.now() - session.start_time).total_seconds())
+    task = db.get_task(session.task_id)
+    status['task_name'] = task.name if task else None
+    status['time_limit'] = task.time_limit if task else None
+    _print_json(status)
+    return 0
+
+
+def cmd_report(db, args):
+    try:
+        if args.kind == 'daily':
+            day = _parse_date(args.value) if args.value else datetime.now()
+            report = {'date': day.strftime('%Y-%m-%d'), **reports.daily_report(db, day)}
+        elif args.kind == 'weekly':
+            week = args.value or '{0}-W{1:02d}'.format(*datetime.now().isocalendar())
+            report = {'week': week, **reports.weekly_report(db, reports.parse_week(week))}
+        elif args.kind == 'monthly':
+            month = args.value or datetime.now().strftime('%Y-%m')
+            report = {'month': month, **reports.monthly_report(db, *reports.parse_month(month))}
+        elif args.kind == 'range':
+            if not args.value or not args.end:
+                print("report range needs START and END dates", file=sys.stderr)
+                return 2
+            start, end = _parse_date(args.value), _parse_date(args.end)
+            # END is inclusive on the command line
+            report = reports.range_report(db, start, end + timedelta(days=1))
+        else:
+            end = _parse_date(args.value) if args.value else datetime.now()
+            report = reports.trend_report(db, args.period, args.count, end)
+    except (ValueError, argparse.ArgumentTypeError) as error:
+        print(error, file=sys.stderr)
+        return 2
+    _print_json(report)
+    return 0
+
+
+def cmd_export(db, args):
+    """Stream the export to a file; .jsonl writes one record per line."""
+    counts = {'tasks': 0, 'sessions': 0}
+    with open(args.file, 'w', encoding='utf-8') as out:
+        if args.file.endswith('.jsonl'):
+            for kind, item in db.iter_export():
+                out.write(json.dumps({'type': kind, **item.to_dict()}) + '\n')
+                counts[kind + 's'] += 1
+        else:
+            # Same layout as /api/export, written incrementally
+            out.write('{"tasks": [')
+            section = 'task'
+            for kind, item in db.iter_export():
+                if kind != section:
+                    out.write('], "sessions": [')
+                    section = kind
+                elif counts[kind + 's']:
+                    out.write(', ')
+                out.write(json.dumps(item.to_dict()))
+                counts[kind + 's'] += 1
+            if section == 'task':
+                out.write('], "sessions": [')
+            out.write(f'], "export_date": {json.dumps(datetime.now().isoformat())}}}\n')
+    _print_json(counts)
+    return 0
+
+
+def _read_jsonl(path):
+    with open(path, encoding='utf-8') as source:
+        for number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                kind = record.pop('type')
+            except (ValueError, AttributeError, KeyError):
+                raise ValueError(f"{path}:{number}: not a JSON record with a 'type' field")
+            yield kind, record
+
+
+def cmd_import(db, args):
+    try:
+        if args.file.endswith('.jsonl'):
+            counts = db.import_records(_read_jsonl(args.file))
+        else:
+            with open(args.file, encoding='utf-8') as source:
+                counts = db.import_data(json.load(source))
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+    _print_json(counts)
+    return 0
+
+
+def cmd_archive(db, args):
+    days = args.days
+    if days is None:
+        days = int(db.get_setting('archive_after_days') or DEFAULT_ARCHIVE_AFTER_DAYS)
+    cutoff = datetime.now() - timedelta(days=days)
+    archived = db.archive_sessions(cutoff)
+    _print_json({'cutoff': cutoff.isoformat(),
+                 'archived': {str(year): count for year, count in archived.items()}})
+    return 0
+
+
+def cmd_rebuild_rollups(db, args):
+    _print_json({'sessions': db.rebuild_rollups()})
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m backend',
+                                     description='Task and Time Tracker command line')
+    parser.add_argument('--db', default=Config.DATABASE,
+                        help='database file (default: %(default)s, or $TASK_AND_TIME_DB)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    start = commands.add_parser('start', help='start tracking a task')
+    start.add_argument('task', nargs='?', help='task id or exact name')
+    start.add_argument('--break', dest='is_break', action='store_true', help='start a break')
+    start.set_defaults(handler=cmd_start)
+
+    stop = commands.add_parser('stop', help='stop the active session')
+    stop.add_argument('--session-id', type=int, help='only stop this session')
+    stop.set_defaults(handler=cmd_stop)
+
+    status = commands.add_parser('status', help='show the active session')
+    status.set_defaults(handler=cmd_status)
+
+    report = commands.add_parser('report', help='print a report as JSON')
+    report.add_argument('kind', choices=['daily', 'weekly', 'monthly', 'range', 'trend'])
+    report.add_argument('value', nargs='?',
+                        help='YYYY-MM-DD (daily, trend end), YYYY-WNN, YYYY-MM or range START')
+    report.add_argument('end', nargs='?', help='range END date (inclusive)')
+    report.add_argument('--period', choices=reports.TREND_PERIODS, default='week',
+                        help='trend period')
+    report.add_argument('--count', type=int, default=12, help='trend periods')
+    report.set_defaults(handler=cmd_report)
+
+    export = commands.add_parser('export', help='export all data to a .json or .jsonl file')
+    export.add_argument('file')
+    export.set_defaults(handler=cmd_export)
+
+    import_ = commands.add_parser('import', help='import a .json or .jsonl export')
+    import_.add_argument('file')
+    import_.set_defaults(handler=cmd_import)
+
+    archive = commands.add_parser('archive', help='move old sessions into yearly archives')
+    archive.add_argument('--days', type=int,
+                         help='archive sessions older than this (default: archive_after_days setting)')
+    archive.set_defaults(handler=cmd_archive)
+
+    rollups = commands.add_parser('rebuild-rollups', help='recompute report rollups')
+    rollups.set_defaults(handler=cmd_rebuild_rollups)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    db = Database(args.db, reader_pool_size=1)
+    try:
+        return args.handler(db, args)
+    finally:
+        db.close()
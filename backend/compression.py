@@ -0,0 +1,135 @@
+"""Accept-Encoding negotiated compression for API responses."""
+import gzip
+import zlib
+
+from flask import current_app, request
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+
+def _gzip_compress(data: bytes, level: int) -> bytes:
+    return gzip.compress(data, compresslevel=max(1, min(level, 9)))
+
+
+def _gzip_stream(chunks, level: int):
+    compressor = zlib.compressobj(max(1, min(level, 9)), zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def _zstd_compress(data: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=max(1, min(level, 22))).compress(data)
+
+
+def _zstd_stream(chunks, level: int):
+    compressor = zstandard.ZstdCompressor(level=max(1, min(level, 22))).compressobj()
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def _brotli_compress(data: bytes, level: int) -> bytes:
+    return brotli.compress(data, quality=max(0, min(level, 11)))
+
+
+def _brotli_stream(chunks, level: int):
+    compressor = brotli.Compressor(quality=max(0, min(level, 11)))
+    for chunk in chunks:
+        out = compressor.process(chunk)
+        if out:
+            yield out
+    yield compressor.finish()
+
+
+# Encodings in server preference order: (name, one-shot, streaming)
+ENCODERS = []
+if zstandard:
+    ENCODERS.append(('zstd', _zstd_compress, _zstd_stream))
+if brotli:
+    ENCODERS.append(('br', _brotli_compress, _brotli_stream))
+ENCODERS.append(('gzip', _gzip_compress, _gzip_stream))
+
+
+def _parse_accept_encoding(header: str):
+    """Parse an Accept-Encoding header into (accepted, refused) codings."""
+    accepted = set()
+    refused = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding)
+        else:
+            refused.add(coding)
+    return accepted, refused
+
+
+def choose_encoding(header: str):
+    """Pick the preferred encoder the client accepts, or None."""
+    accepted, refused = _parse_accept_encoding(header or '')
+    for encoder in ENCODERS:
+        name = encoder[0]
+        if name in accepted or ('*' in accepted and name not in refused):
+            return encoder
+    return None
+
+
+def compress_response(response):
+    """Compress eligible API responses according to Accept-Encoding."""
+    config = current_app.config
+    
+    if (not config['COMPRESS_ENABLED']
+            or not request.path.startswith('/api/')
+            or response.status_code < 200 or response.status_code >= 300
+            or response.status_code == 204
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config['COMPRESS_MIMETYPES']
+            or response.direct_passthrough):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoder = choose_encoding(request.headers.get('Accept-Encoding'))
+    if encoder is None:
+        return response
+    
+    name, compress, stream = encoder
+    level = config['COMPRESS_LEVEL']
+    if response.is_streamed:
+        response.response = stream(response.iter_encoded(), level)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(compress(data, level))
+    
+    response.headers['Content-Encoding'] = name
+    return response
+
+
+def init_compression(app):
+    """Register response compression on a Flask app."""
+    app.after_request(compress_response)
@@ -0,0 +1,39 @@
+"""Configuration for the time tracking application."""
+import os
+from pathlib import Path
+
+from backend.database import DEFAULT_MMAP_SIZE, DEFAULT_READER_POOL_SIZE
+from backend.maintenance import (DEFAULT_IDLE_SECONDS, DEFAULT_SCHEDULE,
+                                 DEFAULT_WAL_CHECKPOINT_BYTES, DEFAULT_WAL_TRUNCATE_BYTES)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+class Config:
+    """Default settings, overridable through environment variables."""
+    
+    # SQLite database file
+    DATABASE = os.environ.get('TASK_AND_TIME_DB', str(PROJECT_ROOT / 'data' / 'tasks.db'))
+    
+    # Read-only connections used for reports, exports and history
+    READER_POOL_SIZE = int(os.environ.get('TASK_AND_TIME_READERS', str(DEFAULT_READER_POOL_SIZE)))
+    MMAP_SIZE = int(os.environ.get('TASK_AND_TIME_MMAP_SIZE', str(DEFAULT_MMAP_SIZE)))
+    
+    # Uploaded notification sounds
+    UPLOAD_FOLDER = os.environ.get('TASK_AND_TIME_SOUNDS', str(PROJECT_ROOT / 'static' / 'sounds'))
+    
+    # Response compression for large API payloads
+    COMPRESS_ENABLED = os.environ.get('TASK_AND_TIME_COMPRESS', '1') != '0'
+    COMPRESS_LEVEL = int(os.environ.get('TASK_AND_TIME_COMPRESS_LEVEL', '6'))
+    COMPRESS_MIN_SIZE = 1024  # bytes
+    COMPRESS_MIMETYPES = {'application/json'}
+    
+    # Background time limit notifications
+    SCHEDULER_ENABLED = os.environ.get('TASK_AND_TIME_SCHEDULER', '1') != '0'
+    
+    # Idle-time database maintenance (job intervals in seconds)
+    MAINTENANCE_ENABLED = os.environ.get('TASK_AND_TIME_MAINTENANCE', '1') != '0'
+    MAINTENANCE_IDLE_SECONDS = DEFAULT_IDLE_SECONDS
+    MAINTENANCE_SCHEDULE = dict(DEFAULT_SCHEDULE)
+    WAL_CHECKPOINT_BYTES = DEFAULT_WAL_CHECKPOINT_BYTES
+    WAL_TRUNCATE_BYTES = DEFAULT_WAL_TRUNCATE_BYTES
@@ -1,36 +1,195 @@
 """Database operations for the time tracking application."""
-import sys
+import itertools
+import json
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from typing import List, Optional
 from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from backend.models import Task, Session, UserSetting
+from backend.rollups import rollup_rows
+
+ARCHIVE_DIR_NAME = "archive"
+DEFAULT_ARCHIVE_AFTER_DAYS = 365
+
+# Tables whose row changes are recorded in change_log for delta sync
+SYNCED_TABLES = ('tasks', 'sessions')
+
+# Bump whenever _create_tables changes so existing databases are upgraded.
+SCHEMA_VERSION = 6
+
+# First schema version with rollup tables; older databases get them rebuilt
+ROLLUPS_SCHEMA_VERSION = 5
+
+DEFAULT_READER_POOL_SIZE = 4
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024  # bytes
+
+# Busy timeout for maintenance statements: they give way instead of queueing
+# behind session writes
+MAINTENANCE_BUSY_TIMEOUT = 0.05  # seconds
+
+# Change log entries kept by compaction, and sequence numbers per transaction
+DEFAULT_CHANGE_LOG_ENTRIES = 10000
+CHANGE_LOG_BATCH_SIZE = 5000
 
 
 class Database:
     """Handles all database operations."""
     
-    def __init__(self, db_path: str = "data/tasks.db"):
-        """Initialize database connection."""
+    def __init__(self, db_path: str = "data/tasks.db",
+                 reader_pool_size: int = DEFAULT_READER_POOL_SIZE,
+                 mmap_size: int = DEFAULT_MMAP_SIZE):
+        """Initialize database handle.
+        
+        Nothing touches the disk here; the file and schema are set up on the
+        first connection so importing and constructing stay cheap.
+        Long reads (reports, exports, history) use a separate pool of
+        ``reader_pool_size`` query-only, memory-mapped connections.
+        """
         self.db_path = db_path
-        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-        self._create_tables()
+        self.reader_pool_size = max(1, reader_pool_size)
+        self.mmap_size = mmap_size
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._watch_conn = None
+        self._watch_lock = threading.Lock()
     
     def _get_connection(self):
         """Get database connection."""
+        if not self._schema_ready:
+            self._ensure_schema()
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
     
+    def _ensure_schema(self):
+        """Create or upgrade the schema unless the version stamp is current."""
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path)
+            try:
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+            finally:
+                conn.close()
+            if version < SCHEMA_VERSION:
+                self._create_tables()
+            if version < ROLLUPS_SCHEMA_VERSION:
+                conn = sqlite3.connect(self.db_path)
+                try:
+                    self._rebuild_rollups(conn)
+                finally:
+                    conn.close()
+            self._schema_ready = True
+    
+    def _acquire_reader(self):
+        """Take a read-only connection from the pool, opening one if allowed."""
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._reader_lock:
+            can_open = self._reader_count < self.reader_pool_size
+            if can_open:
+                self._reader_count += 1
+        if not can_open:
+            return self._readers.get()
+        
+        if not self._schema_ready:
+            self._ensure_schema()
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA query_only = 1')
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        return conn
+    
+    @contextmanager
+    def _read_connection(self):
+        """Pooled read-only connection holding one WAL snapshot while in use.
+        
+        Readers never take the write lock, so reports and exports do not
+        delay session start/stop, and every query inside the block sees the
+        same committed state.
+        """
+        conn = self._acquire_reader()
+        try:
+            conn.execute('BEGIN')
+            yield conn
+        finally:
+            conn.rollback()
+            self._readers.put(conn)
+    
+    def data_version(self) -> int:
+        """PRAGMA data_version of a dedicated connection, for a single watcher.
+        
+        It changes whenever any other connection, in any process, commits.
+        """
+        if not self._schema_ready:
+            self._ensure_schema()
+        with self._watch_lock:
+            if self._watch_conn is None:
+                self._watch_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            return self._watch_conn.execute('PRAGMA data_version').fetchone()[0]
+    
+    def close(self):
+        """Close pooled reader connections."""
+        with self._watch_lock:
+            if self._watch_conn is not None:
+                self._watch_conn.close()
+                self._watch_conn = None
+        while True:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._reader_lock:
+                self._reader_count -= 1
+
+    @staticmethod
+    def _row_to_task(row) -> Task:
+        """Build a Task from a tasks table row."""
+        return Task(
+            id=row['id'],
+            name=row['name'],
+            description=row['description'],
+            time_limit=row['time_limit'],
+            sound_file=row['sound_file'],
+            created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None
+        )
+    
+    @staticmethod
+    def _row_to_session(row) -> Session:
+        """Build a Session from a sessions table row."""
+        return Session(
+            id=row['id'],
+            task_id=row['task_id'],
+            start_time=datetime.fromisoformat(row['start_time']),
+            end_time=datetime.fromisoformat(row['end_time']) if row['end_time'] else None,
+            duration=row['duration'],
+            is_break=bool(row['is_break'])
+        )
+
     def _create_tables(self):
         """Create database tables if they don't exist."""
-        conn = self._get_connection()
+        conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        # Lets maintenance free pages gradually. New files pick it up at once;
+        # existing ones need a single full VACUUM, done here during the upgrade
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        if cursor.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            cursor.execute('VACUUM')
+        # WAL lets readers keep a snapshot while the writer commits
+        cursor.execute('PRAGMA journal_mode = WAL')
+        
         # Tasks table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS tasks (
@@ -56,6 +215,23 @@ class Database:
             )
         ''')
         
+        # At most one open session: older duplicates left behind by racing
+        # starts are closed with zero duration before the index is built
+        cursor.execute('''
+            UPDATE sessions
+            SET end_time = start_time, duration = 0
+            WHERE end_time IS NULL AND id NOT IN (
+                SELECT id FROM sessions
+                WHERE end_time IS NULL
+                ORDER BY start_time DESC
+                LIMIT 1
+            )
+        ''')
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_sessions_single_active
+            ON sessions ((end_time IS NULL)) WHERE end_time IS NULL
+        ''')
+        
         # User settings table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS user_settings (
@@ -65,6 +241,57 @@ class Database:
             )
         ''')
         
+        # Precomputed totals for sessions moved to the yearly archives
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive_totals (
+                year INTEGER NOT NULL,
+                task_id INTEGER NOT NULL,
+                is_break INTEGER NOT NULL DEFAULT 0,
+                total_time INTEGER NOT NULL DEFAULT 0,
+                session_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (year, task_id, is_break)
+            )
+        ''')
+        
+        # Per-task rollups of completed session time, kept current by the
+        # session write methods below
+        for table, bucket in (('rollup_hourly', 'hour'), ('rollup_daily', 'day')):
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {bucket} TEXT NOT NULL,
+                    task_id INTEGER NOT NULL,
+                    is_break INTEGER NOT NULL DEFAULT 0,
+                    total_time INTEGER NOT NULL DEFAULT 0,
+                    session_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY ({bucket}, task_id, is_break)
+                ) WITHOUT ROWID
+            ''')
+        
+        # Change log for delta sync, filled by triggers
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                row_id INTEGER NOT NULL,
+                operation TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_change_log_row
+            ON change_log (table_name, row_id, seq)
+        ''')
+        for table in SYNCED_TABLES:
+            for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_log_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        INSERT INTO change_log (table_name, row_id, operation)
+                        VALUES ('{table}', {row}.id, '{event.lower()}');
+                    END
+                ''')
+        
+        cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
         conn.commit()
         conn.close()
     
@@ -156,47 +383,101 @@ class Database:
         ''', (session.task_id, session.start_time, session.end_time, 
               session.duration, 1 if session.is_break else 0))
         session_id = cursor.lastrowid
+        self._apply_rollups(cursor, session.task_id, session.start_time,
+                            session.duration, session.is_break)
         conn.commit()
         conn.close()
         return session_id
     
-    def update_session(self, session: Session) -> bool:
-        """Update a session."""
+    def start_session(self, task_id: int, is_break: bool = False,
+                      start_time: Optional[datetime] = None) -> Optional[Session]:
+        """Start a session unless another one is already active.
+        
+        A single conditional insert guarded by the unique index on open
+        sessions, so concurrent starts cannot create overlapping sessions.
+        Returns the new session, or None if one was already active.
+        """
         conn = self._get_connection()
         cursor = conn.cursor()
         cursor.execute('''
-            UPDATE sessions 
-            SET end_time = ?, duration = ?
-            WHERE id = ?
-        ''', (session.end_time, session.duration, session.id))
-        updated = cursor.rowcount > 0
+            INSERT INTO sessions (task_id, start_time, is_break)
+            VALUES (?, ?, ?)
+            ON CONFLICT DO NOTHING
+            RETURNING *
+        ''', (task_id, start_time or datetime.now(), 1 if is_break else 0))
+        row = cursor.fetchone()
         conn.commit()
         conn.close()
-        return updated
+        return self._row_to_session(row) if row else None
     
-    def get_sessions_by_task(self, task_id: int) -> List[Session]:
-        """Get all sessions for a task."""
+    def stop_session(self, session_id: Optional[int] = None,
+                     end_time: Optional[datetime] = None) -> Optional[Session]:
+        """Stop the active session, optionally only if it has the given id.
+        
+        The duration is computed in SQL by the same statement that closes
+        the session. Returns the stopped session, or None if there was no
+        matching active session.
+        """
+        query = '''
+            UPDATE sessions
+            SET end_time = :end_time,
+                duration = CAST(ROUND((julianday(:end_time) - julianday(start_time)) * 86400000) / 1000 AS INTEGER)
+            WHERE end_time IS NULL
+        '''
+        if session_id is not None:
+            query += ' AND id = :session_id'
+        query += ' RETURNING *'
+        
         conn = self._get_connection()
         cursor = conn.cursor()
+        cursor.execute(query, {'end_time': end_time or datetime.now(), 'session_id': session_id})
+        row = cursor.fetchone()
+        session = self._row_to_session(row) if row else None
+        if session:
+            self._apply_rollups(cursor, session.task_id, session.start_time,
+                                session.duration, session.is_break)
+        conn.commit()
+        conn.close()
+        return session
+    
+    def update_session(self, session: Session) -> bool:
+        """Update a session."""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        # Take the write lock first so the rollup correction uses the row
+        # as it was right before this update
+        cursor.execute('BEGIN IMMEDIATE')
         cursor.execute('''
+            SELECT task_id, start_time, duration, is_break FROM sessions WHERE id = ?
+        ''', (session.id,))
+        old = cursor.fetchone()
+        if old:
+            cursor.execute('''
+                UPDATE sessions 
+                SET end_time = ?, duration = ?
+                WHERE id = ?
+            ''', (session.end_time, session.duration, session.id))
+            start_time = datetime.fromisoformat(old['start_time'])
+            self._apply_rollups(cursor, old['task_id'], start_time,
+                                old['duration'], old['is_break'], sign=-1)
+            self._apply_rollups(cursor, old['task_id'], start_time,
+                                session.duration, old['is_break'])
+        conn.commit()
+        conn.close()
+        return old is not None
+    
+    def get_sessions_by_task(self, task_id: int) -> List[Session]:
+        """Get all sessions for a task, including archived ones."""
+        query = '''
             SELECT * FROM sessions 
             WHERE task_id = ? 
             ORDER BY start_time DESC
-        ''', (task_id,))
-        rows = cursor.fetchall()
-        conn.close()
+        '''
+        with self._read_connection() as conn:
+            rows = conn.execute(query, (task_id,)).fetchall()
         
-        sessions = []
-        for row in rows:
-            sessions.append(Session(
-                id=row['id'],
-                task_id=row['task_id'],
-                start_time=datetime.fromisoformat(row['start_time']),
-                end_time=datetime.fromisoformat(row['end_time']) if row['end_time'] else None,
-                duration=row['duration'],
-                is_break=bool(row['is_break'])
-            ))
-        return sessions
+        sessions = [self._row_to_session(row) for row in rows]
+        return self._merge_archived(sessions, self._query_archives(query, (task_id,)))
     
     def get_active_session(self) -> Optional[Session]:
         """Get the currently active session (if any)."""
@@ -247,52 +528,126 @@ class Database:
         return None
     
     def get_all_sessions(self) -> List[Session]:
-        """Get all sessions ordered by start time."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
+        """Get all sessions ordered by start time, including archived ones."""
+        query = '''
             SELECT * FROM sessions 
             ORDER BY start_time DESC
-        ''')
-        rows = cursor.fetchall()
-        conn.close()
+        '''
+        with self._read_connection() as conn:
+            rows = conn.execute(query).fetchall()
         
-        sessions = []
-        for row in rows:
-            sessions.append(Session(
-                id=row['id'],
-                task_id=row['task_id'],
-                start_time=datetime.fromisoformat(row['start_time']),
-                end_time=datetime.fromisoformat(row['end_time']) if row['end_time'] else None,
-                duration=row['duration'],
-                is_break=bool(row['is_break'])
-            ))
-        return sessions
+        sessions = [self._row_to_session(row) for row in rows]
+        return self._merge_archived(sessions, self._query_archives(query))
     
     def get_sessions_by_date_range(self, start_date: datetime, end_date: datetime) -> List[Session]:
-        """Get sessions within a date range."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
+        """Get sessions within a date range, including archived ones."""
+        query = '''
             SELECT * FROM sessions 
             WHERE datetime(start_time) >= datetime(?) AND datetime(start_time) < datetime(?)
             ORDER BY start_time DESC
-        ''', (start_date.isoformat(), end_date.isoformat()))
-        rows = cursor.fetchall()
-        conn.close()
+        '''
+        params = (start_date.isoformat(), end_date.isoformat())
+        with self._read_connection() as conn:
+            rows = conn.execute(query, params).fetchall()
         
-        sessions = []
-        for row in rows:
-            sessions.append(Session(
-                id=row['id'],
-                task_id=row['task_id'],
-                start_time=datetime.fromisoformat(row['start_time']),
-                end_time=datetime.fromisoformat(row['end_time']) if row['end_time'] else None,
-                duration=row['duration'],
-                is_break=bool(row['is_break'])
-            ))
+        sessions = [self._row_to_session(row) for row in rows]
+        years = self._archive_years(start_date.year, end_date.year)
+        if years:
+            sessions = self._merge_archived(sessions, self._query_archives(query, params, years))
         return sessions
     
+    # Rollup operations
+    def _apply_rollups(self, cursor, task_id: int, start_time: datetime,
+                       duration: Optional[int], is_break: bool, sign: int = 1):
+        """Add (or with sign=-1 remove) one session's time in the rollups."""
+        hourly, daily = rollup_rows(task_id, start_time, duration, is_break, sign)
+        for table, bucket, rows in (('rollup_hourly', 'hour', hourly),
+                                    ('rollup_daily', 'day', daily)):
+            if not rows:
+                continue
+            cursor.executemany(f'''
+                INSERT INTO {table} ({bucket}, task_id, is_break, total_time, session_count)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT ({bucket}, task_id, is_break) DO UPDATE SET
+                    total_time = total_time + excluded.total_time,
+                    session_count = session_count + excluded.session_count
+            ''', rows)
+            if sign < 0:
+                cursor.executemany(f'''
+                    DELETE FROM {table}
+                    WHERE {bucket} = ? AND task_id = ? AND is_break = ?
+                      AND total_time = 0 AND session_count = 0
+                ''', [row[:3] for row in rows])
+    
+    def _rebuild_rollups(self, conn) -> int:
+        """Recompute both rollup tables from hot and archived sessions."""
+        query = 'SELECT id, task_id, start_time, duration, is_break FROM sessions WHERE duration > 0'
+        conn.row_factory = sqlite3.Row
+        # Hold the write lock from the read to the rewrite so no session
+        # write can commit in between and be lost
+        conn.execute('BEGIN IMMEDIATE')
+        rows = conn.execute(query).fetchall()
+        hot_ids = {row['id'] for row in rows}
+        rows += [row for row in self._query_archives(query) if row['id'] not in hot_ids]
+        
+        totals = {'rollup_hourly': {}, 'rollup_daily': {}}
+        for row in rows:
+            hourly, daily = rollup_rows(row['task_id'], datetime.fromisoformat(row['start_time']),
+                                        row['duration'], row['is_break'])
+            for table, deltas in (('rollup_hourly', hourly), ('rollup_daily', daily)):
+                for bucket, task_id, is_break, total_time, session_count in deltas:
+                    key = (bucket, task_id, is_break)
+                    total = totals[table].get(key, (0, 0))
+                    totals[table][key] = (total[0] + total_time, total[1] + session_count)
+        
+        for table, bucket in (('rollup_hourly', 'hour'), ('rollup_daily', 'day')):
+            conn.execute(f'DELETE FROM {table}')
+            conn.executemany(
+                f'INSERT INTO {table} ({bucket}, task_id, is_break, total_time, session_count) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [key + value for key, value in totals[table].items()]
+            )
+        conn.commit()
+        return len(rows)
+    
+    def rebuild_rollups(self) -> int:
+        """Rebuild the rollup tables from scratch; returns the sessions counted."""
+        conn = self._get_connection()
+        try:
+            return self._rebuild_rollups(conn)
+        finally:
+            conn.close()
+    
+    def get_daily_rollups(self, start_date: datetime, end_date: datetime) -> List[dict]:
+        """Get per-task daily totals for days in [start_date, end_date)."""
+        return self._get_rollups('rollup_daily', 'day',
+                                 start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+    
+    def get_hourly_rollups(self, start_date: datetime, end_date: datetime) -> List[dict]:
+        """Get per-task hourly totals for hours in [start_date, end_date)."""
+        return self._get_rollups('rollup_hourly', 'hour',
+                                 start_date.strftime('%Y-%m-%dT%H:00'), end_date.strftime('%Y-%m-%dT%H:00'))
+    
+    def _get_rollups(self, table: str, bucket: str, start: str, end: str) -> List[dict]:
+        with self._read_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT r.{bucket} AS bucket, r.task_id, t.name AS task_name,
+                       r.is_break, r.total_time, r.session_count
+                FROM {table} AS r
+                LEFT JOIN tasks AS t ON t.id = r.task_id
+                WHERE r.{bucket} >= ? AND r.{bucket} < ?
+                ORDER BY r.{bucket}
+            ''', (start, end)).fetchall()
+        
+        return [{
+            'bucket': row['bucket'],
+            'task_id': row['task_id'],
+            'task_name': row['task_name'],
+            'is_break': bool(row['is_break']),
+            'total_time': row['total_time'],
+            'session_count': row['session_count']
+        } for row in rows]
+    
     # Settings operations
     def set_setting(self, key: str, value: str):
         """Set a user setting."""
@@ -314,42 +669,494 @@ class Database:
         conn.close()
         return row['value'] if row else None
     
+    # Delta sync
+    def get_changes_since(self, since: int) -> dict:
+        """Get rows of synced tables changed after a change_log sequence number.
+        
+        Falls back to a full snapshot (``full`` set) when ``since`` is 0 or
+        older than the compacted part of the log.
+        """
+        # One snapshot so the sequence number matches the rows
+        with self._read_connection() as conn:
+            return self._collect_changes(conn, since)
+    
+    def _collect_changes(self, conn, since: int) -> dict:
+        """Build the get_changes_since result inside a read snapshot."""
+        cursor = conn.cursor()
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")
+        row = cursor.fetchone()
+        latest = row['seq'] if row else 0
+        cursor.execute("SELECT value FROM user_settings WHERE key = 'change_log_floor'")
+        row = cursor.fetchone()
+        floor = int(row['value']) if row else 0
+        
+        result = {'seq': latest, 'full': since <= 0 or since < floor}
+        if result['full']:
+            cursor.execute('SELECT * FROM tasks ORDER BY created_at DESC')
+            tasks = [self._row_to_task(row) for row in cursor.fetchall()]
+            cursor.execute('SELECT * FROM sessions ORDER BY start_time DESC')
+            sessions = self._merge_archived([self._row_to_session(row) for row in cursor.fetchall()],
+                                            self._query_archives('SELECT * FROM sessions'))
+            result['tasks'] = {'upserted': [t.to_dict() for t in tasks], 'deleted': []}
+            result['sessions'] = {'upserted': [s.to_dict() for s in sessions], 'deleted': []}
+            return result
+        
+        # SQLite returns the operation of the row holding MAX(seq)
+        cursor.execute('''
+            SELECT table_name, row_id, operation, MAX(seq) AS seq
+            FROM change_log
+            WHERE seq > ? AND seq <= ?
+            GROUP BY table_name, row_id
+        ''', (since, latest))
+        changed = {table: [] for table in SYNCED_TABLES}
+        deleted = {table: [] for table in SYNCED_TABLES}
+        for row in cursor.fetchall():
+            target = deleted if row['operation'] == 'delete' else changed
+            target[row['table_name']].append(row['row_id'])
+        
+        cursor.execute('''
+            SELECT * FROM tasks WHERE id IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(changed['tasks']),))
+        tasks = [self._row_to_task(row) for row in cursor.fetchall()]
+        session_query = '''
+            SELECT * FROM sessions WHERE id IN (SELECT value FROM json_each(?))
+        '''
+        cursor.execute(session_query, (json.dumps(changed['sessions']),))
+        sessions = [self._row_to_session(row) for row in cursor.fetchall()]
+        
+        # Sessions changed before being archived are served from the archives
+        missing = set(changed['sessions']) - {s.id for s in sessions}
+        if missing:
+            archived = self._query_archives(session_query, (json.dumps(sorted(missing)),))
+            sessions.extend(self._row_to_session(row) for row in archived)
+        
+        result['tasks'] = {'upserted': [t.to_dict() for t in tasks], 'deleted': deleted['tasks']}
+        result['sessions'] = {'upserted': [s.to_dict() for s in sessions], 'deleted': deleted['sessions']}
+        return result
+    
+    def compact_change_log(self, max_entries: int = DEFAULT_CHANGE_LOG_ENTRIES,
+                           batch_size: int = CHANGE_LOG_BATCH_SIZE) -> dict:
+        """Drop superseded change log entries and keep at most ``max_entries``.
+        
+        Truncating raises the floor, so clients behind it get a full snapshot.
+        """
+        totals = {'superseded': 0, 'truncated': 0}
+        conn = self._get_connection()
+        try:
+            after = 0
+            while after is not None:
+                step = self._compact_change_log_batch(conn, after, max_entries, batch_size)
+                totals['superseded'] += step['superseded']
+                totals['truncated'] += step['truncated']
+                after = step['next']
+        finally:
+            conn.close()
+        return totals
+    
+    def compact_change_log_batch(self, after: int, max_entries: int = DEFAULT_CHANGE_LOG_ENTRIES,
+                                 batch_size: int = CHANGE_LOG_BATCH_SIZE) -> dict:
+        """Compact one range of ``batch_size`` sequence numbers past ``after``.
+        
+        Runs on a fail-fast connection; ``next`` is where to continue, or None.
+        """
+        conn = self._maintenance_connection()
+        conn.row_factory = sqlite3.Row
+        try:
+            return self._compact_change_log_batch(conn, after, max_entries, batch_size)
+        finally:
+            conn.close()
+    
+    def _compact_change_log_batch(self, conn, after: int, max_entries: int,
+                                  batch_size: int) -> dict:
+        """Compact the next ``batch_size`` sequence numbers of the log past ``after``."""
+        cursor = conn.cursor()
+        cursor.execute('SELECT MIN(seq) FROM change_log WHERE seq > ?', (after,))
+        first = cursor.fetchone()[0]
+        if first is None:
+            return {'superseded': 0, 'truncated': 0, 'next': None}
+        after = first - 1
+        last = after + batch_size
+        
+        # Newest entry to drop so that max_entries entries survive compaction;
+        # read before the deletes below take the write lock
+        cursor.execute('''
+            SELECT seq FROM change_log
+            WHERE NOT EXISTS (
+                SELECT 1 FROM change_log AS newer
+                WHERE newer.table_name = change_log.table_name
+                  AND newer.row_id = change_log.row_id
+                  AND newer.seq > change_log.seq
+            )
+            ORDER BY seq DESC LIMIT 1 OFFSET ?
+        ''', (max_entries,))
+        row = cursor.fetchone()
+        cut = min(row['seq'], last) if row else after
+        
+        cursor.execute('''
+            DELETE FROM change_log
+            WHERE seq > ? AND seq <= ? AND EXISTS (
+                SELECT 1 FROM change_log AS newer
+                WHERE newer.table_name = change_log.table_name
+                  AND newer.row_id = change_log.row_id
+                  AND newer.seq > change_log.seq
+            )
+        ''', (after, last))
+        superseded = cursor.rowcount
+        
+        truncated = 0
+        if cut > after:
+            cursor.execute('DELETE FROM change_log WHERE seq > ? AND seq <= ?', (after, cut))
+            truncated = cursor.rowcount
+            cursor.execute('''
+                INSERT OR REPLACE INTO user_settings (key, value)
+                VALUES ('change_log_floor', ?)
+            ''', (str(cut),))
+        
+        cursor.execute('SELECT 1 FROM change_log WHERE seq > ? LIMIT 1', (last,))
+        more = cursor.fetchone() is not None
+        conn.commit()
+        return {'superseded': superseded, 'truncated': truncated, 'next': last if more else None}
+    
     # Data export/import
     def export_all_data(self) -> dict:
-        """Export all data as a dictionary."""
-        tasks = self.get_all_tasks()
+        """Export all data as a dictionary.
         
-        all_sessions = []
-        for task in tasks:
-            sessions = self.get_sessions_by_task(task.id)
-            all_sessions.extend(sessions)
+        Tasks and sessions are read from one snapshot, so an export never
+        mixes states from before and after a concurrent write.
+        """
+        with self._read_connection() as conn:
+            tasks = [self._row_to_task(row) for row in
+                     conn.execute('SELECT * FROM tasks ORDER BY created_at DESC').fetchall()]
+            rows = conn.execute('''
+                SELECT * FROM sessions
+                WHERE task_id IN (SELECT id FROM tasks)
+                ORDER BY start_time DESC
+            ''').fetchall()
+        
+        sessions = self._merge_archived([self._row_to_session(row) for row in rows],
+                                        self._query_archives('SELECT * FROM sessions'))
+        sessions_by_task = {task.id: [] for task in tasks}
+        for session in sessions:
+            if session.task_id in sessions_by_task:
+                sessions_by_task[session.task_id].append(session)
         
         return {
             'tasks': [task.to_dict() for task in tasks],
-            'sessions': [session.to_dict() for session in all_sessions],
+            'sessions': [session.to_dict() for task in tasks
+                         for session in sessions_by_task[task.id]],
             'export_date': datetime.now().isoformat()
         }
     
-    def import_data(self, data: dict):
-        """Import data from dictionary."""
+    def iter_export(self, batch_size: int = 1000):
+        """Stream all data as ('task', Task) then ('session', Session) records.
+        
+        Reads from one snapshot in batches, so exports of any size run in
+        constant memory without blocking writers. Like export_all_data, only
+        sessions of existing tasks are included.
+        """
+        with self._read_connection() as conn:
+            task_ids = set()
+            cursor = conn.execute('SELECT * FROM tasks ORDER BY created_at DESC')
+            for row in cursor:
+                task_ids.add(row['id'])
+                yield 'task', self._row_to_task(row)
+            
+            hot_ids = set()
+            cursor = conn.execute('''
+                SELECT * FROM sessions
+                WHERE task_id IN (SELECT id FROM tasks)
+                ORDER BY start_time DESC
+            ''')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    hot_ids.add(row['id'])
+                    yield 'session', self._row_to_session(row)
+        
+        for year in reversed(self._archive_years()):
+            for row in self._query_archives('SELECT * FROM sessions ORDER BY start_time DESC', years=[year]):
+                if row['task_id'] in task_ids and row['id'] not in hot_ids:
+                    yield 'session', self._row_to_session(row)
+    
+    def import_records(self, records, batch_size: int = 1000) -> dict:
+        """Import ('task', dict) / ('session', dict) records from an iterable.
+        
+        Tasks get new ids and sessions are remapped to them, so every task
+        must come before its sessions. Rows are written on one connection and
+        committed every ``batch_size`` records. Returns the imported counts.
+        """
         # Map old IDs to new IDs
         task_id_map = {}
+        counts = {'tasks': 0, 'sessions': 0}
         
-        # Import tasks
-        for task_data in data.get('tasks', []):
-            old_id = task_data.get('id')
-            task = Task.from_dict(task_data)
-            task.id = None  # Let database assign new ID
-            new_id = self.create_task(task)
-            if old_id:
-                task_id_map[old_id] = new_id
-        
-        # Import sessions
-        for session_data in data.get('sessions', []):
-            session = Session.from_dict(session_data)
-            # Map old task_id to new task_id
-            if session.task_id in task_id_map:
-                session.task_id = task_id_map[session.task_id]
-                session.id = None  # Let database assign new ID
-                self.create_session(session)
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            for index, (kind, data) in enumerate(records, 1):
+                if kind == 'task':
+                    task = Task.from_dict(data)
+                    cursor.execute('''
+                        INSERT INTO tasks (name, description, time_limit, sound_file, created_at)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', (task.name, task.description, task.time_limit, task.sound_file, task.created_at))
+                    if data.get('id'):
+                        task_id_map[data['id']] = cursor.lastrowid
+                    counts['tasks'] += 1
+                elif kind == 'session':
+                    session = Session.from_dict(data)
+                    # Map old task_id to new task_id
+                    if session.task_id not in task_id_map:
+                        continue
+                    session.task_id = task_id_map[session.task_id]
+                    # An incoming running session is skipped if one is already open
+                    cursor.execute('''
+                        INSERT INTO sessions (task_id, start_time, end_time, duration, is_break)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT DO NOTHING
+                    ''', (session.task_id, session.start_time, session.end_time,
+                          session.duration, 1 if session.is_break else 0))
+                    if not cursor.rowcount:
+                        continue
+                    self._apply_rollups(cursor, session.task_id, session.start_time,
+                                        session.duration, session.is_break)
+                    counts['sessions'] += 1
+                if index % batch_size == 0:
+                    conn.commit()
+            conn.commit()
+        finally:
+            conn.close()
+        return counts
+    
+    def import_data(self, data: dict) -> dict:
+        """Import data from dictionary."""
+        records = itertools.chain(
+            (('task', task_data) for task_data in data.get('tasks', [])),
+            (('session', session_data) for session_data in data.get('sessions', []))
+        )
+        return self.import_records(records)
+    
+    # Maintenance operations
+    def _maintenance_connection(self):
+        """Connection that fails fast when the write lock is taken."""
+        if not self._schema_ready:
+            self._ensure_schema()
+        return sqlite3.connect(self.db_path, timeout=MAINTENANCE_BUSY_TIMEOUT)
+    
+    def wal_size(self) -> int:
+        """Size of the write-ahead log in bytes (0 if there is none)."""
+        wal = Path(f"{self.db_path}-wal")
+        return wal.stat().st_size if wal.exists() else 0
+    
+    def checkpoint(self, mode: str = 'PASSIVE') -> dict:
+        """Checkpoint the WAL; PASSIVE never waits for readers or writers."""
+        if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"Unknown checkpoint mode: {mode}")
+        conn = self._maintenance_connection()
+        try:
+            busy, log_pages, checkpointed = conn.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+        finally:
+            conn.close()
+        return {'mode': mode, 'busy': bool(busy), 'log_pages': log_pages, 'checkpointed': checkpointed}
+    
+    def incremental_vacuum(self, pages: int) -> dict:
+        """Return up to ``pages`` free pages to the filesystem in one short step."""
+        conn = self._maintenance_connection()
+        try:
+            auto_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if auto_vacuum != 2:
+                # Files are switched by the schema upgrade; never run the
+                # full VACUUM here, it holds the write lock for the rewrite
+                return {'enabled': False, 'freed': 0, 'remaining': free_pages}
+            conn.execute(f'PRAGMA incremental_vacuum({int(pages)})').fetchall()
+            conn.commit()
+            remaining = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        finally:
+            conn.close()
+        return {'enabled': True, 'freed': free_pages - remaining, 'remaining': remaining}
+    
+    def optimize(self, analysis_limit: int = 400):
+        """Refresh query planner statistics where SQLite thinks they are stale."""
+        conn = self._maintenance_connection()
+        try:
+            conn.execute(f'PRAGMA analysis_limit = {int(analysis_limit)}')
+            conn.execute('PRAGMA optimize')
+        finally:
+            conn.close()
+    
+    def integrity_check(self) -> List[str]:
+        """Run PRAGMA quick_check on a read-only connection; ['ok'] when healthy."""
+        with self._read_connection() as conn:
+            return [row[0] for row in conn.execute('PRAGMA quick_check').fetchall()]
+    
+    # Archive operations
+    def _archive_dir(self) -> Path:
+        """Directory holding this database's per-year archive partitions."""
+        db_path = Path(self.db_path)
+        return db_path.parent / ARCHIVE_DIR_NAME / db_path.stem
+
+    def _archive_path(self, year: int) -> Path:
+        """Path of the archive partition for a given year."""
+        return self._archive_dir() / f"sessions_{year}.db"
+
+    def _archive_years(self, first_year: Optional[int] = None,
+                       last_year: Optional[int] = None) -> List[int]:
+        """List archived years, optionally restricted to a range."""
+        archive_dir = self._archive_dir()
+        if not archive_dir.is_dir():
+            return []
+
+        years = []
+        for path in archive_dir.glob('sessions_*.db'):
+            try:
+                year = int(path.stem.split('_', 1)[1])
+            except ValueError:
+                continue
+            if first_year is not None and year < first_year:
+                continue
+            if last_year is not None and year > last_year:
+                continue
+            years.append(year)
+        return sorted(years)
+
+    def _query_archives(self, query: str, params: tuple = (),
+                        years: Optional[List[int]] = None) -> list:
+        """Run a read-only query against archive partitions and collect rows."""
+        if years is None:
+            years = self._archive_years()
+
+        rows = []
+        for year in years:
+            uri = f"{self._archive_path(year).resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True)
+            conn.row_factory = sqlite3.Row
+            try:
+                rows.extend(conn.execute(query, params).fetchall())
+            finally:
+                conn.close()
+        return rows
+
+    def _merge_archived(self, sessions: List[Session], archived_rows: list) -> List[Session]:
+        """Merge archived rows into hot sessions, newest first.
+        
+        A session present in both (a move interrupted between the two
+        files) is taken from the hot table.
+        """
+        if not archived_rows:
+            return sessions
+        hot_ids = {session.id for session in sessions}
+        sessions.extend(self._row_to_session(row) for row in archived_rows
+                        if row['id'] not in hot_ids)
+        sessions.sort(key=lambda s: s.start_time, reverse=True)
+        return sessions
+    
+    def archive_sessions(self, before: datetime) -> dict:
+        """Move completed sessions started before a cutoff into yearly archives.
+
+        Rows are committed to the partition before they are removed from the
+        hot table, so an interrupted move is finished by running it again.
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT DISTINCT CAST(strftime('%Y', start_time) AS INTEGER) AS year
+            FROM sessions
+            WHERE end_time IS NOT NULL AND datetime(start_time) < datetime(?)
+        ''', (before.isoformat(),))
+        years = [row['year'] for row in cursor.fetchall()]
+
+        archived = {}
+        self._archive_dir().mkdir(parents=True, exist_ok=True)
+        for year in sorted(years):
+            cursor.execute('ATTACH DATABASE ? AS archive', (str(self._archive_path(year)),))
+            try:
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS archive.sessions (
+                        id INTEGER PRIMARY KEY,
+                        task_id INTEGER NOT NULL,
+                        start_time TIMESTAMP NOT NULL,
+                        end_time TIMESTAMP,
+                        duration INTEGER,
+                        is_break INTEGER DEFAULT 0
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS archive.idx_sessions_start_time
+                    ON sessions (start_time)
+                ''')
+                conn.commit()
+
+                selection = '''
+                    FROM main.sessions
+                    WHERE end_time IS NOT NULL
+                      AND datetime(start_time) < datetime(?)
+                      AND CAST(strftime('%Y', start_time) AS INTEGER) = ?
+                '''
+                params = (before.isoformat(), year)
+                # Copy first, in a transaction that only writes the partition
+                cursor.execute(f'''
+                    INSERT OR REPLACE INTO archive.sessions
+                        (id, task_id, start_time, end_time, duration, is_break)
+                    SELECT id, task_id, start_time, end_time, duration, is_break
+                    {selection}
+                ''', params)
+                conn.commit()
+
+                # Then count and delete, in a transaction that only writes main.
+                # Rows changed since the copy stay hot until the next run.
+                selection += '''
+                      AND EXISTS (
+                          SELECT 1 FROM archive.sessions AS copy
+                          WHERE copy.id = main.sessions.id
+                            AND copy.end_time IS main.sessions.end_time
+                            AND copy.duration IS main.sessions.duration
+                      )
+                '''
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute(f'''
+                    INSERT INTO main.archive_totals
+                        (year, task_id, is_break, total_time, session_count)
+                    SELECT ?, task_id, is_break, COALESCE(SUM(duration), 0), COUNT(*)
+                    {selection}
+                    GROUP BY task_id, is_break
+                    ON CONFLICT (year, task_id, is_break) DO UPDATE SET
+                        total_time = total_time + excluded.total_time,
+                        session_count = session_count + excluded.session_count
+                ''', (year,) + params)
+                cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM main.change_log')
+                last_seq = cursor.fetchone()[0]
+                cursor.execute(f'DELETE {selection}', params)
+                archived[year] = cursor.rowcount
+                # Archived sessions still exist for clients; don't sync them as deletions
+                cursor.execute('''
+                    DELETE FROM main.change_log
+                    WHERE seq > ? AND table_name = 'sessions' AND operation = 'delete'
+                ''', (last_seq,))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.execute('DETACH DATABASE archive')
+
+        conn.close()
+        return archived
+
+    def get_archived_totals(self) -> List[dict]:
+        """Get precomputed per-year totals for archived sessions."""
+        with self._read_connection() as conn:
+            rows = conn.execute('''
+                SELECT year, task_id, is_break, total_time, session_count
+                FROM archive_totals
+                ORDER BY year DESC, task_id
+            ''').fetchall()
 
+        return [{
+            'year': row['year'],
+            'task_id': row['task_id'],
+            'is_break': bool(row['is_break']),
+            'total_time': row['total_time'],
+            'session_count': row['session_count']
+        } for row in rows]
@@ -0,0 +1,176 @@
+"""Idle-time database maintenance."""
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from backend.database import DEFAULT_CHANGE_LOG_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+# Seconds between runs of each job
+DEFAULT_SCHEDULE = {
+    'checkpoint': 300,
+    'incremental_vacuum': 3600,
+    'optimize': 3600,
+    'compact_change_log': 86400,
+    'integrity_check': 86400,
+}
+DEFAULT_IDLE_SECONDS = 30
+
+# WAL sizes at which the checkpoint job runs, and truncates the file
+DEFAULT_WAL_CHECKPOINT_BYTES = 4 * 1024 * 1024
+DEFAULT_WAL_TRUNCATE_BYTES = 64 * 1024 * 1024
+
+
+class MaintenanceScheduler:
+    """Runs WAL checkpoints, incremental vacuum, ``PRAGMA optimize``, change
+    log compaction and integrity checks in a background thread.
+
+    Jobs only start once no request has been seen for ``idle_seconds``. Every
+    write step runs on a connection with a tiny busy timeout and holds the
+    write lock briefly (vacuum and change log compaction work in small steps
+    and re-check for activity in between), so a session start/stop never waits
+    on maintenance; a job that finds the database busy is retried on the next
+    pass. Per-job timings are kept in :meth:`status`.
+    """
+
+    def __init__(self, db, schedule: Optional[dict] = None,
+                 idle_seconds: float = DEFAULT_IDLE_SECONDS, poll_interval: float = 30,
+                 wal_checkpoint_bytes: int = DEFAULT_WAL_CHECKPOINT_BYTES,
+                 wal_truncate_bytes: int = DEFAULT_WAL_TRUNCATE_BYTES, vacuum_pages: int = 256,
+                 change_log_entries: int = DEFAULT_CHANGE_LOG_ENTRIES):
+        self.db = db
+        self.schedule = dict(DEFAULT_SCHEDULE, **(schedule or {}))
+        self.idle_seconds = idle_seconds
+        self.poll_interval = poll_interval
+        self.wal_checkpoint_bytes = wal_checkpoint_bytes
+        self.wal_truncate_bytes = wal_truncate_bytes
+        self.vacuum_pages = vacuum_pages
+        self.change_log_entries = change_log_entries
+        self._last_activity = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._next_run = {job: time.monotonic() + self.idle_seconds for job in self.schedule}
+        self._status = {job: {
+            'interval_s': interval,
+            'runs': 0,
+            'failures': 0,
+            'skipped_busy': 0,
+            'last_run': None,
+            'last_duration_ms': None,
+            'total_duration_ms': 0.0,
+            'last_result': None,
+            'last_error': None,
+        } for job, interval in self.schedule.items()}
+
+    def start(self):
+        """Start the background thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='db-maintenance', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ask the background thread to exit."""
+        self._stop.set()
+
+    def touch(self):
+        """Record activity; maintenance waits until the app has been idle."""
+        self._last_activity = time.monotonic()
+
+    def is_idle(self) -> bool:
+        return time.monotonic() - self._last_activity >= self.idle_seconds
+
+    def status(self) -> dict:
+        """Timings and results of every job, for monitoring."""
+        with self._lock:
+            jobs = {job: dict(status) for job, status in self._status.items()}
+        return {
+            'idle': self.is_idle(),
+            'wal_size': self.db.wal_size(),
+            'jobs': jobs
+        }
+
+    def run_job(self, job: str):
+        """Run one job now and record its timing."""
+        started = time.perf_counter()
+        result = error = None
+        busy = False
+        try:
+            result = getattr(self, f'_job_{job}')()
+        except sqlite3.OperationalError as exc:
+            busy = 'locked' in str(exc) or 'busy' in str(exc)
+            error = str(exc)
+        except Exception as exc:
+            logger.exception('Maintenance job %s failed', job)
+            error = str(exc)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            status = self._status[job]
+            status['last_run'] = datetime.now().isoformat()
+            status['last_duration_ms'] = round(duration_ms, 2)
+            status['total_duration_ms'] = round(status['total_duration_ms'] + duration_ms, 2)
+            if busy:
+                status['skipped_busy'] += 1
+            elif error:
+                status['failures'] += 1
+            else:
+                status['runs'] += 1
+                status['last_result'] = result
+            status['last_error'] = error
+        return not busy
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            for job, interval in self.schedule.items():
+                if self._stop.is_set() or not self.is_idle():
+                    break
+                if time.monotonic() < self._next_run[job]:
+                    continue
+                if self.run_job(job):
+                    self._next_run[job] = time.monotonic() + interval
+
+    # Jobs
+    def _job_checkpoint(self):
+        size = self.db.wal_size()
+        if size < self.wal_checkpoint_bytes:
+            return {'wal_size': size, 'checkpointed': False}
+        mode = 'TRUNCATE' if size >= self.wal_truncate_bytes else 'PASSIVE'
+        return dict(self.db.checkpoint(mode), wal_size=size)
+
+    def _job_incremental_vacuum(self):
+        freed = 0
+        while True:
+            step = self.db.incremental_vacuum(self.vacuum_pages)
+            freed += step['freed']
+            if not step['enabled'] or not step['freed'] or not step['remaining']:
+                break
+            if self._stop.is_set() or not self.is_idle():
+                break
+        return dict(step, freed=freed)
+
+    def _job_optimize(self):
+        self.db.optimize()
+
+    def _job_compact_change_log(self):
+        totals = {'superseded': 0, 'truncated': 0}
+        after = 0
+        while after is not None:
+            step = self.db.compact_change_log_batch(after, self.change_log_entries)
+            totals['superseded'] += step['superseded']
+            totals['truncated'] += step['truncated']
+            after = step['next']
+            if self._stop.is_set() or not self.is_idle():
+                break
+        return dict(totals, complete=after is None)
+
+    def _job_integrity_check(self):
+        problems = self.db.integrity_check()
+        if problems != ['ok']:
+            logger.error('Database integrity check failed: %s', problems)
+        return problems
@@ -0,0 +1,208 @@
+"""Report building from the daily and hourly rollup tables.
+
+Kept free of Flask so the API and command-line tools share it.
+"""
+from datetime import datetime, timedelta
+
+
+def parse_week(week: str) -> datetime:
+    """Monday of an ISO week given as YYYY-WNN; raises ValueError."""
+    try:
+        year, week_num = week.split('-W')
+        year = int(year)
+        week_num = int(week_num)
+    except (ValueError, AttributeError):
+        raise ValueError(f"Invalid week: {week}")
+    
+    jan_4 = datetime(year, 1, 4)
+    return jan_4 + timedelta(days=-jan_4.weekday(), weeks=week_num-1)
+
+
+def parse_month(month: str):
+    """(first day, first day of next month) for YYYY-MM; raises ValueError."""
+    try:
+        year, month_num = month.split('-')
+        year = int(year)
+        month_num = int(month_num)
+    except (ValueError, AttributeError):
+        raise ValueError(f"Invalid month: {month}")
+    
+    month_start = datetime(year, month_num, 1)
+    if month_num == 12:
+        month_end = datetime(year + 1, 1, 1)
+    else:
+        month_end = datetime(year, month_num + 1, 1)
+    return month_start, month_end
+
+
+def _task_stats(rollups: list) -> list:
+    """Sum non-break rollup rows per task."""
+    task_stats = {}
+    for row in rollups:
+        if row['is_break']:
+            continue
+        stats = task_stats.setdefault(row['task_id'], {
+            'task_name': row['task_name'] or 'Unknown',
+            'total_time': 0,
+            'session_count': 0
+        })
+        stats['total_time'] += row['total_time']
+        stats['session_count'] += row['session_count']
+    return [stats for stats in task_stats.values() if stats['total_time']]
+
+
+def daily_report(db, day: datetime) -> dict:
+    """Work and break time for one day, per task and per hour."""
+    start_of_day = day.replace(hour=0, minute=0, second=0, microsecond=0)
+    rollups = db.get_hourly_rollups(start_of_day, start_of_day + timedelta(days=1))
+    
+    hourly = {}
+    break_time = 0
+    for row in rollups:
+        if row['is_break']:
+            break_time += row['total_time']
+        else:
+            hour = row['bucket'][11:]
+            hourly[hour] = hourly.get(hour, 0) + row['total_time']
+    
+    tasks = _task_stats(rollups)
+    return {
+        'total_time': sum(task['total_time'] for task in tasks),
+        'break_time': break_time,
+        'tasks': tasks,
+        'hourly': hourly
+    }
+
+
+def weekly_report(db, week_start: datetime) -> dict:
+    """Work time for the seven days from ``week_start``, per task and per day."""
+    rollups = db.get_daily_rollups(week_start, week_start + timedelta(days=7))
+    
+    daily = {}
+    for row in rollups:
+        if not row['is_break'] and row['total_time']:
+            daily[row['bucket']] = daily.get(row['bucket'], 0) + row['total_time']
+    
+    tasks = _task_stats(rollups)
+    return {
+        'total_time': sum(task['total_time'] for task in tasks),
+        'tasks': tasks,
+        'daily': daily
+    }
+
+
+def monthly_report(db, month_start: datetime, month_end: datetime) -> dict:
+    """Work time and session counts per task for [month_start, month_end)."""
+    tasks = _task_stats(db.get_daily_rollups(month_start, month_end))
+    return {
+        'total_time': sum(task['total_time'] for task in tasks),
+        'total_sessions': sum(task['session_count'] for task in tasks),
+        'tasks': tasks
+    }
+
+
+def range_report(db, start: datetime, end: datetime) -> dict:
+    """Work and break time per task and per day for days in [start, end)."""
+    rollups = db.get_daily_rollups(start, end)
+    
+    daily = {}
+    break_time = 0
+    for row in rollups:
+        if row['is_break']:
+            break_time += row['total_time']
+        elif row['total_time']:
+            daily[row['bucket']] = daily.get(row['bucket'], 0) + row['total_time']
+    
+    tasks = _task_stats(rollups)
+    return {
+        'start': start.strftime('%Y-%m-%d'),
+        'end': end.strftime('%Y-%m-%d'),
+        'total_time': sum(task['total_time'] for task in tasks),
+        'break_time': break_time,
+        'total_sessions': sum(task['session_count'] for task in tasks),
+        'tasks': tasks,
+        'daily': daily
+    }
+
+
+TREND_PERIODS = ('week', 'month')
+MAX_TREND_PERIODS = 120
+
+
+def _period_start(day: datetime, period: str) -> datetime:
+    """Start of the week (Monday) or month containing ``day``."""
+    day = day.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _shift_period(start: datetime, period: str, offset: int) -> datetime:
+    """Start of the period ``offset`` periods after the one starting at ``start``."""
+    if period == 'week':
+        return start + timedelta(weeks=offset)
+    months = start.year * 12 + start.month - 1 + offset
+    return start.replace(year=months // 12, month=months % 12 + 1)
+
+
+def _period_label(start: datetime, period: str) -> str:
+    if period == 'week':
+        year, week, _ = start.isocalendar()
+        return f'{year}-W{week:02d}'
+    return start.strftime('%Y-%m')
+
+
+def trend_report(db, period: str, count: int, end: datetime) -> dict:
+    """Totals for ``count`` consecutive periods ending with the one containing ``end``.
+    
+    All periods come from a single scan of the daily rollups, which also
+    covers one extra leading period so the first returned period has a
+    period-over-period delta too.
+    """
+    if period not in TREND_PERIODS:
+        raise ValueError(f"Invalid period: {period}")
+    if not 1 <= count <= MAX_TREND_PERIODS:
+        raise ValueError(f"count must be between 1 and {MAX_TREND_PERIODS}")
+    
+    last_start = _period_start(end, period)
+    starts = [_shift_period(last_start, period, offset) for offset in range(-count, 2)]
+    rollups = db.get_daily_rollups(starts[0], starts[-1])
+    
+    buckets = [{'total_time': 0, 'break_time': 0, 'session_count': 0, 'rows': []}
+               for _ in range(count + 1)]
+    for row in rollups:
+        day = datetime.strptime(row['bucket'], '%Y-%m-%d')
+        if period == 'week':
+            index = (day - starts[0]).days // 7
+        else:
+            index = (day.year - starts[0].year) * 12 + day.month - starts[0].month
+        bucket = buckets[index]
+        if row['is_break']:
+            bucket['break_time'] += row['total_time']
+        else:
+            bucket['total_time'] += row['total_time']
+            bucket['session_count'] += row['session_count']
+            bucket['rows'].append(row)
+    
+    periods = []
+    for index in range(1, count + 1):
+        bucket = buckets[index]
+        previous = buckets[index - 1]['total_time']
+        delta = bucket['total_time'] - previous
+        periods.append({
+            'label': _period_label(starts[index], period),
+            'start': starts[index].strftime('%Y-%m-%d'),
+            'end': starts[index + 1].strftime('%Y-%m-%d'),
+            'total_time': bucket['total_time'],
+            'break_time': bucket['break_time'],
+            'session_count': bucket['session_count'],
+            'delta': delta,
+            'delta_percent': round(delta / previous * 100, 1) if previous else None,
+            'tasks': _task_stats(bucket['rows'])
+        })
+    
+    return {
+        'period': period,
+        'count': count,
+        'periods': periods
+    }
@@ -0,0 +1,71 @@
+"""Per-task hourly and daily rollups of session time.
+
+A session's duration is split across every hour (and day) it overlaps, so
+time past midnight is credited to the next day. Its session count goes to
+the bucket it started in.
+
+Run ``python -m backend.rollups`` to rebuild the rollup tables from the
+session history.
+"""
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+HOUR_FORMAT = '%Y-%m-%dT%H:00'
+DAY_FORMAT = '%Y-%m-%d'
+
+
+def split_by_hour(start_time: datetime, duration: int) -> List[Tuple[datetime, int]]:
+    """Split ``duration`` seconds from ``start_time`` into (hour, seconds) pieces.
+
+    Pieces are whole seconds and always add up to ``duration``.
+    """
+    pieces = []
+    end_time = start_time + timedelta(seconds=duration)
+    cursor = start_time
+    allocated = 0
+    while cursor < end_time:
+        hour = cursor.replace(minute=0, second=0, microsecond=0)
+        piece_end = min(hour + timedelta(hours=1), end_time)
+        elapsed = round((piece_end - start_time).total_seconds())
+        pieces.append((hour, elapsed - allocated))
+        allocated = elapsed
+        cursor = piece_end
+    return pieces
+
+
+def rollup_rows(task_id: int, start_time: datetime, duration: int,
+                is_break: bool, sign: int = 1) -> Tuple[list, list]:
+    """Rollup deltas for one completed session.
+
+    Returns ``(hourly, daily)`` lists of
+    ``(bucket, task_id, is_break, total_time, session_count)`` rows; ``sign``
+    is -1 to remove a session that was previously added.
+    """
+    if not duration:
+        return [], []
+
+    is_break = 1 if is_break else 0
+    hourly = []
+    daily = {}
+    for index, (hour, seconds) in enumerate(split_by_hour(start_time, duration)):
+        count = sign if index == 0 else 0
+        hourly.append((hour.strftime(HOUR_FORMAT), task_id, is_break, sign * seconds, count))
+        day = hour.strftime(DAY_FORMAT)
+        total, sessions = daily.get(day, (0, 0))
+        daily[day] = (total + sign * seconds, sessions + count)
+
+    return hourly, [(day, task_id, is_break, total, count)
+                    for day, (total, count) in daily.items()]
+
+
+def main():
+    from backend.config import Config
+    from backend.database import Database
+
+    db = Database(Config.DATABASE)
+    count = db.rebuild_rollups()
+    print(f"Rebuilt rollups from {count} sessions in {Config.DATABASE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,27 @@
 """API routes for the time tracking application."""
-import sys
+import json
+import math
+import queue
 from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
-from flask import Blueprint, request, jsonify, send_from_directory
+from flask import Blueprint, Response, current_app, request, jsonify
 from datetime import datetime, timedelta
+from werkzeug.local import LocalProxy
 from werkzeug.utils import secure_filename
 import os
-from backend.database import Database
-from backend.models import Task, Session
+from backend import reports
+from backend.database import DEFAULT_ARCHIVE_AFTER_DAYS, DEFAULT_CHANGE_LOG_ENTRIES
+from backend.models import Task
 
 api = Blueprint('api', __name__)
-db = Database()
 
-UPLOAD_FOLDER = 'static/sounds'
+# The Database is created by the app factory; resolve it per request.
+db = LocalProxy(lambda: current_app.extensions['database'])
+scheduler = LocalProxy(lambda: current_app.extensions['scheduler'])
+
+# Seconds between keep-alive comments on the event stream
+EVENT_KEEPALIVE_INTERVAL = 15
+
 ALLOWED_EXTENSIONS = {'mp3', 'wav', 'ogg'}
 
 def allowed_file(filename):
@@ -23,6 +29,18 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def parse_time_limit(value):
+    """Time limit in whole seconds, or None for no limit; raises ValueError."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError(value)
+    seconds = float(value)
+    if not math.isfinite(seconds) or seconds < 0 or seconds != int(seconds):
+        raise ValueError(value)
+    return int(seconds) or None
+
+
 # Task endpoints
 @api.route('/tasks', methods=['GET'])
 def get_tasks():
@@ -39,16 +57,22 @@ def create_task():
     if not data.get('name'):
         return jsonify({'error': 'Task name is required'}), 400
     
+    try:
+        time_limit = parse_time_limit(data.get('time_limit'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'time_limit must be a whole number of seconds'}), 400
+    
     task = Task(
         id=None,
         name=data['name'],
         description=data.get('description', ''),
-        time_limit=data.get('time_limit'),
+        time_limit=time_limit,
         sound_file=data.get('sound_file')
     )
     
     task_id = db.create_task(task)
     task.id = task_id
+    scheduler.set_task_limit(task.id, task.time_limit)
     
     return jsonify(task.to_dict()), 201
 
@@ -71,12 +95,18 @@ def update_task(task_id):
     if not task:
         return jsonify({'error': 'Task not found'}), 404
     
+    if 'time_limit' in data:
+        try:
+            task.time_limit = parse_time_limit(data['time_limit'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'time_limit must be a whole number of seconds'}), 400
+    
     task.name = data.get('name', task.name)
     task.description = data.get('description', task.description)
-    task.time_limit = data.get('time_limit', task.time_limit)
     task.sound_file = data.get('sound_file', task.sound_file)
     
     db.update_task(task)
+    scheduler.set_task_limit(task.id, task.time_limit)
     return jsonify(task.to_dict())
 
 
@@ -84,6 +114,7 @@ def update_task(task_id):
 def delete_task(task_id):
     """Delete a task."""
     if db.delete_task(task_id):
+        scheduler.set_task_limit(task_id, None)
         return jsonify({'message': 'Task deleted'}), 200
     return jsonify({'error': 'Task not found'}), 404
 
@@ -97,21 +128,11 @@ def start_session():
     if not data.get('task_id'):
         return jsonify({'error': 'task_id is required'}), 400
     
-    # Check if there's an active session
-    active_session = db.get_active_session()
-    if active_session:
+    session = db.start_session(data['task_id'], is_break=data.get('is_break', False))
+    if not session:
         return jsonify({'error': 'There is already an active session. Stop it first.'}), 400
     
-    session = Session(
-        id=None,
-        task_id=data['task_id'],
-        start_time=datetime.now(),
-        is_break=data.get('is_break', False)
-    )
-    
-    session_id = db.create_session(session)
-    session.id = session_id
-    
+    scheduler.session_started(session)
     return jsonify(session.to_dict()), 201
 
 
@@ -121,21 +142,13 @@ def stop_session():
     data = request.json
     
     session_id = data.get('session_id')
-    if not session_id:
-        # Try to find active session
-        session = db.get_active_session()
-        if not session:
+    session = db.stop_session(session_id or None)
+    if not session:
+        if not session_id:
             return jsonify({'error': 'No active session found'}), 404
-    else:
-        # Get specific session (not implemented in db yet, use active)
-        session = db.get_active_session()
-        if not session or session.id != session_id:
-            return jsonify({'error': 'Session not found'}), 404
-    
-    session.end_time = datetime.now()
-    session.duration = int((session.end_time - session.start_time).total_seconds())
+        return jsonify({'error': 'Session not found'}), 404
     
-    db.update_session(session)
+    scheduler.session_stopped(session.id)
     return jsonify(session.to_dict())
 
 
@@ -177,148 +190,128 @@ def get_all_sessions():
     return jsonify(result)
 
 
+# Event stream
+@api.route('/events', methods=['GET'])
+def stream_events():
+    """Stream limit-reached events as server-sent events."""
+    # The generator outlives the request context, so bind the real object
+    limits = current_app.extensions['scheduler']
+    subscriber = limits.subscribe()
+    
+    def generate():
+        try:
+            # Flush headers right away so the client sees the stream open
+            yield ': connected\n\n'
+            while True:
+                try:
+                    event = subscriber.get(timeout=EVENT_KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            limits.unsubscribe(subscriber)
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# Sync endpoints
+@api.route('/sync', methods=['GET'])
+def sync_changes():
+    """Get tasks and sessions changed since a sequence number.
+    
+    Clients pass the ``seq`` from their previous sync as ``since``; a full
+    snapshot is returned (with ``full`` set) for ``since=0`` or when the
+    change log no longer reaches back that far.
+    """
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'error': 'since must be an integer'}), 400
+    
+    return jsonify(db.get_changes_since(since))
+
+
+@api.route('/sync/compact', methods=['POST'])
+def compact_sync_log():
+    """Drop superseded and, beyond max_entries, old change log entries."""
+    data = request.json or {}
+    
+    try:
+        max_entries = int(data.get('max_entries', DEFAULT_CHANGE_LOG_ENTRIES))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'max_entries must be an integer'}), 400
+    
+    return jsonify(db.compact_change_log(max_entries))
+
+
 # Reports endpoints
 @api.route('/reports/daily/<date>', methods=['GET'])
 def get_daily_report(date):
-    """Get daily report."""
+    """Get daily report, read from the rollup tables."""
     try:
         report_date = datetime.fromisoformat(date)
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     
-    start_of_day = report_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_of_day = start_of_day + timedelta(days=1)
-    
-    sessions = db.get_sessions_by_date_range(start_of_day, end_of_day)
-    
-    # Group by task
-    task_stats = {}
-    total_time = 0
-    break_time = 0
-    
-    for session in sessions:
-        if session.duration:
-            if session.is_break:
-                break_time += session.duration
-            else:
-                total_time += session.duration
-                
-                if session.task_id not in task_stats:
-                    task = db.get_task(session.task_id)
-                    task_stats[session.task_id] = {
-                        'task_name': task.name if task else 'Unknown',
-                        'total_time': 0,
-                        'session_count': 0
-                    }
-                
-                task_stats[session.task_id]['total_time'] += session.duration
-                task_stats[session.task_id]['session_count'] += 1
-    
-    return jsonify({
-        'date': date,
-        'total_time': total_time,
-        'break_time': break_time,
-        'tasks': list(task_stats.values())
-    })
+    return jsonify({'date': date, **reports.daily_report(db, report_date)})
 
 
 @api.route('/reports/weekly/<week>', methods=['GET'])
 def get_weekly_report(week):
     """Get weekly report. Week format: YYYY-WW"""
     try:
-        year, week_num = week.split('-W')
-        year = int(year)
-        week_num = int(week_num)
-        
-        # Get Monday of the week
-        jan_4 = datetime(year, 1, 4)
-        week_start = jan_4 + timedelta(days=-jan_4.weekday(), weeks=week_num-1)
-        week_end = week_start + timedelta(days=7)
-    except (ValueError, AttributeError):
+        week_start = reports.parse_week(week)
+    except ValueError:
         return jsonify({'error': 'Invalid week format. Use YYYY-WNN'}), 400
     
-    sessions = db.get_sessions_by_date_range(week_start, week_end)
-    
-    # Group by task and day
-    task_stats = {}
-    daily_stats = {}
-    total_time = 0
-    
-    for session in sessions:
-        if session.duration and not session.is_break:
-            total_time += session.duration
-            
-            # Task stats
-            if session.task_id not in task_stats:
-                task = db.get_task(session.task_id)
-                task_stats[session.task_id] = {
-                    'task_name': task.name if task else 'Unknown',
-                    'total_time': 0,
-                    'session_count': 0
-                }
-            
-            task_stats[session.task_id]['total_time'] += session.duration
-            task_stats[session.task_id]['session_count'] += 1
-            
-            # Daily stats
-            day_key = session.start_time.strftime('%Y-%m-%d')
-            if day_key not in daily_stats:
-                daily_stats[day_key] = 0
-            daily_stats[day_key] += session.duration
-    
-    return jsonify({
-        'week': week,
-        'total_time': total_time,
-        'tasks': list(task_stats.values()),
-        'daily': daily_stats
-    })
+    return jsonify({'week': week, **reports.weekly_report(db, week_start)})
 
 
 @api.route('/reports/monthly/<month>', methods=['GET'])
 def get_monthly_report(month):
     """Get monthly report. Month format: YYYY-MM"""
     try:
-        year, month_num = month.split('-')
-        year = int(year)
-        month_num = int(month_num)
-        
-        month_start = datetime(year, month_num, 1)
-        if month_num == 12:
-            month_end = datetime(year + 1, 1, 1)
-        else:
-            month_end = datetime(year, month_num + 1, 1)
-    except (ValueError, AttributeError):
+        month_start, month_end = reports.parse_month(month)
+    except ValueError:
         return jsonify({'error': 'Invalid month format. Use YYYY-MM'}), 400
     
-    sessions = db.get_sessions_by_date_range(month_start, month_end)
-    
-    # Group by task
-    task_stats = {}
-    total_time = 0
-    total_sessions = 0
-    
-    for session in sessions:
-        if session.duration and not session.is_break:
-            total_time += session.duration
-            total_sessions += 1
-            
-            if session.task_id not in task_stats:
-                task = db.get_task(session.task_id)
-                task_stats[session.task_id] = {
-                    'task_name': task.name if task else 'Unknown',
-                    'total_time': 0,
-                    'session_count': 0
-                }
-            
-            task_stats[session.task_id]['total_time'] += session.duration
-            task_stats[session.task_id]['session_count'] += 1
+    return jsonify({'month': month, **reports.monthly_report(db, month_start, month_end)})
+
+
+@api.route('/reports/trend', methods=['GET'])
+def get_trend_report():
+    """Get totals for consecutive weeks or months.
     
-    return jsonify({
-        'month': month,
-        'total_time': total_time,
-        'total_sessions': total_sessions,
-        'tasks': list(task_stats.values())
-    })
+    Query parameters: ``period`` (week or month), ``count`` (number of
+    periods, default 12) and ``end`` (a date inside the last period,
+    default today).
+    """
+    period = request.args.get('period', 'week')
+    if period not in reports.TREND_PERIODS:
+        return jsonify({'error': 'Invalid period. Use week or month'}), 400
+    
+    try:
+        count = int(request.args.get('count', 12))
+    except ValueError:
+        return jsonify({'error': 'count must be an integer'}), 400
+    if not 1 <= count <= reports.MAX_TREND_PERIODS:
+        return jsonify({'error': f'count must be between 1 and {reports.MAX_TREND_PERIODS}'}), 400
+    
+    try:
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else datetime.now()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    return jsonify(reports.trend_report(db, period, count, end))
+
+
+# Maintenance status
+@api.route('/maintenance', methods=['GET'])
+def get_maintenance_status():
+    """Get timings and results of the background maintenance jobs."""
+    return jsonify(current_app.extensions['maintenance'].status())
 
 
 # File upload endpoint
@@ -340,8 +333,9 @@ def upload_sound():
         name, ext = os.path.splitext(filename)
         filename = f"{name}_{timestamp}{ext}"
         
-        Path(UPLOAD_FOLDER).mkdir(parents=True, exist_ok=True)
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
+        upload_folder = current_app.config['UPLOAD_FOLDER']
+        Path(upload_folder).mkdir(parents=True, exist_ok=True)
+        filepath = os.path.join(upload_folder, filename)
         file.save(filepath)
         
         return jsonify({'filename': filename, 'path': f'/sounds/{filename}'}), 201
@@ -367,7 +361,66 @@ def import_data():
     
     try:
         db.import_data(data)
+        scheduler.rebuild()
         return jsonify({'message': 'Data imported successfully'}), 200
     except Exception as e:
         return jsonify({'error': f'Import failed: {str(e)}'}), 400
 
+
+
+# Archive endpoints
+@api.route('/archive', methods=['GET'])
+def get_archive():
+    """Get precomputed totals for archived sessions."""
+    return jsonify({
+        'archive_after_days': int(db.get_setting('archive_after_days') or DEFAULT_ARCHIVE_AFTER_DAYS),
+        'totals': db.get_archived_totals()
+    })
+
+
+@api.route('/archive', methods=['PUT'])
+def update_archive_settings():
+    """Set the default age, in days, after which sessions are archived."""
+    data = request.json or {}
+    try:
+        days = int(data['archive_after_days'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'archive_after_days must be an integer'}), 400
+    if days < 0:
+        return jsonify({'error': 'archive_after_days must not be negative'}), 400
+    
+    db.set_setting('archive_after_days', str(days))
+    return jsonify({'archive_after_days': days})
+
+
+@api.route('/archive', methods=['POST'])
+def archive_sessions():
+    """Move old sessions into the yearly archive partitions.
+
+    The cutoff is either an explicit ``before`` date or ``days`` ago; when
+    neither is given the ``archive_after_days`` setting is used.
+    """
+    data = request.json or {}
+    
+    if data.get('before'):
+        try:
+            cutoff = datetime.fromisoformat(data['before'])
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    else:
+        days = data.get('days')
+        if days is None:
+            days = db.get_setting('archive_after_days') or DEFAULT_ARCHIVE_AFTER_DAYS
+        try:
+            days = int(days)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'days must be an integer'}), 400
+        if days < 0:
+            return jsonify({'error': 'days must not be negative'}), 400
+        cutoff = datetime.now() - timedelta(days=days)
+    
+    archived = db.archive_sessions(cutoff)
+    return jsonify({
+        'cutoff': cutoff.isoformat(),
+        'archived': {str(year): count for year, count in archived.items()}
+    })
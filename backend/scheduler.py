@@ -0,0 +1,203 @@
+"""Server-side time limit notifications for active sessions."""
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from backend.models import Session
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for sessions started or stopped by other processes
+RESYNC_INTERVAL = 5
+
+
+class TimeLimitScheduler:
+    """Fires limit-reached events when an active session hits its task's limit.
+
+    Deadlines (``Session.start_time`` + ``Task.time_limit``) live in a min-heap
+    that a single background thread sleeps on. Task limits are cached and kept
+    current through :meth:`set_task_limit`. Cancelled or rescheduled entries
+    are marked dead in place and skipped when they reach the top of the heap.
+    Sessions started or stopped outside the API (the command line) are picked
+    up when ``PRAGMA data_version`` changes, and each deadline is checked
+    against the database before its event fires.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._heap = []
+        self._entries = {}       # session_id -> heap entry
+        self._active = {}        # session_id -> (task_id, start_time), with or without a limit
+        self._task_limits = {}   # task_id -> time_limit in seconds
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._subscribers = set()
+        self._thread = None
+        self._stopped = False
+
+    def start(self):
+        """Start the background thread, which first rebuilds from the database."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='time-limit-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ask the background thread to exit."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def rebuild(self):
+        """Reload task limits and the active session from the database."""
+        # Read under the lock so an API update cannot land between the read
+        # and the swap and be overwritten
+        with self._condition:
+            self._task_limits = {task.id: task.time_limit for task in self.db.get_all_tasks()}
+            active = self.db.get_active_session()
+            for entry in self._entries.values():
+                entry[-1] = False
+            self._entries.clear()
+            self._active.clear()
+            if active:
+                self._schedule(active)
+            self._condition.notify()
+
+    # Updates from the API
+    def set_task_limit(self, task_id: int, time_limit: Optional[int]):
+        """Record a task's limit (None when removed) and reschedule its session."""
+        with self._condition:
+            if time_limit:
+                self._task_limits[task_id] = time_limit
+            else:
+                self._task_limits.pop(task_id, None)
+            for session_id, (session_task_id, start_time) in self._active.items():
+                if session_task_id == task_id:
+                    self._cancel(session_id)
+                    self._push(session_id, task_id, start_time, time_limit)
+            self._condition.notify()
+
+    def session_started(self, session: Session):
+        """Schedule the limit of a newly started session."""
+        with self._condition:
+            self._schedule(session)
+            self._condition.notify()
+
+    def resync(self):
+        """Reconcile the tracked session with the active one in the database."""
+        with self._condition:
+            session = self.db.get_active_session()
+            expected = session.id if session and not session.is_break else None
+            if set(self._active) == ({expected} if expected else set()):
+                return
+            for session_id in list(self._active):
+                self._active.pop(session_id)
+                self._cancel(session_id)
+            if session:
+                self._schedule(session)
+            self._condition.notify()
+
+    def session_stopped(self, session_id: int):
+        """Forget a stopped session."""
+        with self._condition:
+            self._active.pop(session_id, None)
+            self._cancel(session_id)
+
+    # Subscribers
+    def subscribe(self) -> queue.Queue:
+        """Register a subscriber; events are put on the returned queue."""
+        subscriber = queue.Queue()
+        with self._condition:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        """Remove a subscriber."""
+        with self._condition:
+            self._subscribers.discard(subscriber)
+
+    # Heap maintenance (callers hold the condition)
+    def _schedule(self, session: Session):
+        if session.is_break or session.end_time is not None:
+            return
+        self._active[session.id] = (session.task_id, session.start_time)
+        self._cancel(session.id)
+        self._push(session.id, session.task_id, session.start_time,
+                   self._task_limits.get(session.task_id))
+
+    def _push(self, session_id: int, task_id: int, start_time: datetime,
+              time_limit: Optional[int]):
+        try:
+            time_limit = int(time_limit or 0)
+        except (TypeError, ValueError):
+            logger.warning('Ignoring invalid time limit %r of task %s', time_limit, task_id)
+            return
+        if time_limit <= 0:
+            return
+        deadline = start_time.timestamp() + time_limit
+        entry = [deadline, next(self._counter), session_id, task_id, start_time, time_limit, True]
+        self._entries[session_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _cancel(self, session_id: int):
+        entry = self._entries.pop(session_id, None)
+        if entry:
+            entry[-1] = False
+
+    def _run(self):
+        try:
+            self.rebuild()
+            version = self.db.data_version()
+        except Exception:
+            logger.exception('Failed to load active session for time limits')
+            version = None
+
+        while True:
+            due = None
+            with self._condition:
+                if self._stopped:
+                    return
+                while self._heap and not self._heap[0][-1]:
+                    heapq.heappop(self._heap)
+                delay = self._heap[0][0] - time.time() if self._heap else RESYNC_INTERVAL
+                if delay > 0:
+                    self._condition.wait(min(delay, RESYNC_INTERVAL))
+                else:
+                    due = heapq.heappop(self._heap)
+                    self._entries.pop(due[2], None)
+
+            try:
+                if due:
+                    self._fire(due)
+                current = self.db.data_version()
+                if current != version:
+                    version = current
+                    self.resync()
+            except Exception:
+                logger.exception('Time limit scheduler failed to read the database')
+
+    def _fire(self, entry: list):
+        """Publish the event of a due entry if its session is still running."""
+        deadline, _, session_id, task_id, start_time, time_limit, _ = entry
+        event = {
+            'type': 'limit_reached',
+            'session_id': session_id,
+            'task_id': task_id,
+            'time_limit': time_limit,
+            'start_time': start_time.isoformat(),
+            'deadline': datetime.fromtimestamp(deadline).isoformat(),
+            'fired_at': datetime.now().isoformat()
+        }
+        with self._condition:
+            active = self.db.get_active_session()
+            if not active or active.id != session_id:
+                # Stopped (or replaced) outside the API since it was scheduled
+                self.resync()
+                return
+            for subscriber in self._subscribers:
+                subscriber.put(event)
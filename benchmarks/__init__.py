@@ -0,0 +1 @@
+"""Performance benchmarks for the time tracking application."""
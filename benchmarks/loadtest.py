@@ -0,0 +1,241 @@
+"""End-to-end HTTP load test with simulated browser clients.
+
+Generates a database, serves the real app (``backend.app.create_app``) on a
+local port and drives it with concurrent clients that follow the frontend's
+request mix: polling the active session, starting/stopping sessions, opening
+reports and exporting. Reports throughput, latency percentiles per endpoint
+and error/lock rates as JSON so runs can be compared across releases.
+
+Usage:
+    python -m benchmarks.loadtest [--clients N] [--duration S] [--output results.json]
+"""
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from flask import jsonify
+from werkzeug.serving import make_server
+
+from backend.app import create_app
+from backend.database import Database
+
+# (weight, action) pairs approximating what open browser tabs do
+REQUEST_MIX = [
+    (70, 'poll_active'),
+    (8, 'list_tasks'),
+    (8, 'start_stop'),
+    (3, 'daily_report'),
+    (3, 'weekly_report'),
+    (3, 'monthly_report'),
+    (3, 'all_sessions'),
+    (2, 'export'),
+]
+
+
+def generate_database(path: str, task_count: int, session_count: int, seed: int):
+    """Create a database with tasks and a history of completed sessions."""
+    db = Database(path)
+    db.get_all_tasks()  # creates the schema
+    rng = random.Random(seed)
+    now = datetime.now()
+
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        'INSERT INTO tasks (name, description, time_limit, created_at) VALUES (?, ?, ?, ?)',
+        [(f'Task {i}', f'Generated task {i}', rng.choice([None, 1500, 3600]),
+          now - timedelta(days=400)) for i in range(task_count)]
+    )
+    sessions = []
+    for _ in range(session_count):
+        start = now - timedelta(seconds=rng.randint(3600, 365 * 86400))
+        duration = rng.randint(60, 3 * 3600)
+        sessions.append((rng.randint(1, task_count), start, start + timedelta(seconds=duration),
+                         duration, 1 if rng.random() < 0.1 else 0))
+    conn.executemany(
+        'INSERT INTO sessions (task_id, start_time, end_time, duration, is_break) VALUES (?, ?, ?, ?, ?)',
+        sessions
+    )
+    conn.commit()
+    conn.close()
+    db.rebuild_rollups()
+
+
+class Client(threading.Thread):
+    """One simulated browser tab issuing requests until the deadline."""
+
+    def __init__(self, base_url: str, deadline: float, task_count: int,
+                 think_time: float, seed: int, results: list):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.deadline = deadline
+        self.task_count = task_count
+        self.think_time = think_time
+        self.rng = random.Random(seed)
+        self.results = results
+        self.weights = [weight for weight, _ in REQUEST_MIX]
+        self.actions = [action for _, action in REQUEST_MIX]
+
+    def request(self, label: str, path: str, body=None):
+        """Issue one request and record (label, seconds, status, locked)."""
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(
+            self.base_url + path, data=data, method='POST' if data else 'GET',
+            headers={'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'}
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=60) as response:
+                response.read()
+                status = response.status
+                payload = b''
+        except urllib.error.HTTPError as error:
+            status = error.code
+            payload = error.read()
+        except OSError:
+            status = 0
+            payload = b''
+        elapsed = time.perf_counter() - started
+        self.results.append((label, elapsed, status, b'locked' in payload))
+        return status
+
+    def run(self):
+        while time.time() < self.deadline:
+            action = self.rng.choices(self.actions, self.weights)[0]
+            getattr(self, action)()
+            if self.think_time:
+                time.sleep(self.rng.expovariate(1 / self.think_time))
+
+    def poll_active(self):
+        self.request('GET /sessions/active', '/api/sessions/active')
+
+    def list_tasks(self):
+        self.request('GET /tasks', '/api/tasks')
+
+    def start_stop(self):
+        # Another client may own the active session: 400/404 are expected
+        task_id = self.rng.randint(1, self.task_count)
+        self.request('POST /sessions/start', '/api/sessions/start', {'task_id': task_id})
+        self.request('POST /sessions/stop', '/api/sessions/stop', {})
+
+    def daily_report(self):
+        day = datetime.now() - timedelta(days=self.rng.randint(0, 60))
+        self.request('GET /reports/daily', f"/api/reports/daily/{day.strftime('%Y-%m-%d')}")
+
+    def weekly_report(self):
+        year, week, _ = (datetime.now() - timedelta(weeks=self.rng.randint(0, 12))).isocalendar()
+        self.request('GET /reports/weekly', f'/api/reports/weekly/{year}-W{week:02d}')
+
+    def monthly_report(self):
+        month = datetime.now() - timedelta(days=30 * self.rng.randint(0, 11))
+        self.request('GET /reports/monthly', f"/api/reports/monthly/{month.strftime('%Y-%m')}")
+
+    def all_sessions(self):
+        self.request('GET /sessions/all', '/api/sessions/all')
+
+    def export(self):
+        self.request('GET /export', '/api/export')
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(results: list, elapsed: float) -> dict:
+    """Aggregate raw samples into per-endpoint statistics."""
+    by_endpoint = defaultdict(list)
+    for sample in results:
+        by_endpoint[sample[0]].append(sample)
+    by_endpoint['ALL'] = list(results)
+
+    summary = {}
+    for label, samples in sorted(by_endpoint.items()):
+        latencies = sorted(sample[1] * 1000 for sample in samples)
+        statuses = [sample[2] for sample in samples]
+        summary[label] = {
+            'requests': len(samples),
+            'throughput_rps': round(len(samples) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'max_ms': round(latencies[-1], 2),
+            'client_errors': sum(1 for status in statuses if 400 <= status < 500),
+            'server_errors': sum(1 for status in statuses if status == 0 or status >= 500),
+            'error_rate': round(sum(1 for status in statuses if status == 0 or status >= 500)
+                                / len(samples), 4),
+            'lock_errors': sum(1 for sample in samples if sample[3]),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=20, help='concurrent simulated clients')
+    parser.add_argument('--duration', type=float, default=30, help='test length in seconds')
+    parser.add_argument('--tasks', type=int, default=20, help='tasks in the generated database')
+    parser.add_argument('--sessions', type=int, default=20000, help='sessions in the generated database')
+    parser.add_argument('--think-time', type=float, default=0.1,
+                        help='mean pause between a client\'s requests in seconds')
+    parser.add_argument('--seed', type=int, default=1, help='random seed')
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'loadtest.db')
+        generate_database(db_path, args.tasks, args.sessions, args.seed)
+
+        app = create_app({'DATABASE': db_path, 'UPLOAD_FOLDER': str(Path(tmp) / 'sounds')})
+
+        # Surface SQLite errors (e.g. "database is locked") so they can be counted
+        @app.errorhandler(sqlite3.OperationalError)
+        def sqlite_error(error):
+            return jsonify({'error': str(error)}), 503
+
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+
+        results = []
+        started = time.time()
+        clients = [
+            Client(base_url, started + args.duration, args.tasks, args.think_time,
+                   args.seed + i, results)
+            for i in range(args.clients)
+        ]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.time() - started
+
+        server.shutdown()
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'config': vars(args),
+        'elapsed_s': round(elapsed, 2),
+        'endpoints': summarize(results, elapsed),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Measure import-to-first-request latency of the backend.
+
+Each run starts a fresh interpreter, imports ``backend.app``, builds the app
+and serves one ``/api/tasks`` request through the test client, so the numbers
+include module import, app construction and the lazy schema check.
+
+Usage:
+    python -m benchmarks.startup [--runs N] [--output results.json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Runs inside the child interpreter; prints one JSON line of timings (ms).
+CHILD_SCRIPT = '''
+import json, sys, time
+t0 = time.perf_counter()
+from backend.app import create_app
+t1 = time.perf_counter()
+app = create_app({'DATABASE': sys.argv[1], 'TESTING': True})
+t2 = time.perf_counter()
+response = app.test_client().get('/api/tasks')
+t3 = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({
+    'import': (t1 - t0) * 1000,
+    'create_app': (t2 - t1) * 1000,
+    'first_request': (t3 - t2) * 1000,
+    'total': (t3 - t0) * 1000,
+}))
+'''
+
+
+def run_once(db_path: str) -> dict:
+    """Run one cold start in a child interpreter."""
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT, db_path],
+        cwd=PROJECT_ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(samples: list) -> dict:
+    """Median and worst case of each phase."""
+    return {
+        phase: {
+            'median_ms': round(statistics.median(s[phase] for s in samples), 2),
+            'max_ms': round(max(s[phase] for s in samples), 2)
+        }
+        for phase in samples[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='cold starts per scenario')
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args()
+    
+    results = {'python': sys.version.split()[0], 'runs': args.runs}
+    with tempfile.TemporaryDirectory() as tmp:
+        # First start creates the schema; later starts only read the stamp
+        fresh = [run_once(str(Path(tmp) / f'fresh_{i}.db')) for i in range(args.runs)]
+        existing_db = str(Path(tmp) / 'existing.db')
+        run_once(existing_db)
+        existing = [run_once(existing_db) for _ in range(args.runs)]
+    
+    results['fresh_database'] = summarize(fresh)
+    results['existing_database'] = summarize(existing)
+    
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -19,6 +19,29 @@ function initTimer() {
 
     // Load tasks into selector
     loadTasksIntoSelector();
+
+    // Time limits are tracked by the server, even while this tab is throttled
+    subscribeToLimitEvents();
+}
+
+function subscribeToLimitEvents() {
+    if (!window.EventSource) return;
+
+    const events = new EventSource(`${API_BASE}/events`);
+    events.addEventListener('limit_reached', (event) => {
+        const data = JSON.parse(event.data);
+        if (state.activeSession && state.activeSession.id === data.session_id) {
+            notifyLimitReached();
+        }
+    });
+}
+
+function notifyLimitReached() {
+    if (limitReached) return;
+
+    limitReached = true;
+    playNotificationSound();
+    document.getElementById('limitWarning').style.display = 'block';
 }
 
 async function loadTasksIntoSelector() {
@@ -194,9 +217,7 @@ function updateTimerDisplay() {
     // Check time limit
     if (state.currentTask && state.currentTask.time_limit && !limitReached) {
         if (elapsedSeconds >= state.currentTask.time_limit) {
-            limitReached = true;
-            playNotificationSound();
-            document.getElementById('limitWarning').style.display = 'block';
+            notifyLimitReached();
         }
     }
 }
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+import pytest
+
+from backend.app import create_app
+from backend.database import Database
+from backend.models import Session, Task
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(str(tmp_path / 'tasks.db'))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def task_id(db):
+    return db.create_task(Task(id=None, name='Writing'))
+
+
+@pytest.fixture
+def add_session(db, task_id):
+    """Factory for completed sessions of ``task_id``; returns the new id."""
+    def add(start, seconds=600, is_break=False):
+        return db.create_session(Session(None, task_id, start, start + timedelta(seconds=seconds),
+                                          seconds, is_break))
+    return add
+
+
+@pytest.fixture
+def app(tmp_path):
+    return create_app({
+        'DATABASE': str(tmp_path / 'tasks.db'),
+        'UPLOAD_FOLDER': str(tmp_path / 'sounds'),
+        'SCHEDULER_ENABLED': False,
+        'MAINTENANCE_ENABLED': False,
+    })
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,65 @@
+import gzip
+
+import pytest
+
+from backend.compression import ENCODERS, choose_encoding
+
+
+def encoding_name(header):
+    encoder = choose_encoding(header)
+    return encoder[0] if encoder else None
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip', 'gzip'),
+    ('GZIP;q=0.5', 'gzip'),
+    ('deflate, gzip;q=1.0', 'gzip'),
+    ('gzip;q=0', None),
+    ('identity', None),
+    ('', None),
+    (None, None),
+    ('*', ENCODERS[0][0]),
+])
+def test_choose_encoding(header, expected):
+    assert encoding_name(header) == expected
+
+
+def test_wildcard_respects_refusals():
+    assert encoding_name('*, ' + ', '.join(f'{name};q=0' for name, _, _ in ENCODERS)) is None
+    assert encoding_name('*;q=0') is None
+
+
+def test_server_preference_wins_over_header_order():
+    names = [name for name, _, _ in ENCODERS]
+    assert encoding_name(', '.join(reversed(names))) == names[0]
+
+
+@pytest.fixture
+def many_tasks(client):
+    for index in range(40):
+        client.post('/api/tasks', json={'name': f'Task {index}', 'description': 'x' * 40})
+
+
+def test_large_json_is_compressed(client, many_tasks):
+    response = client.get('/api/tasks', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert len(gzip.decompress(response.get_data())) > 1024
+
+
+def test_refused_encoding_is_sent_uncompressed(client, many_tasks):
+    response = client.get('/api/tasks', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in response.headers
+    assert len(response.get_json()) == 40
+
+
+def test_small_response_is_not_compressed(client):
+    response = client.get('/api/tasks', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json() == []
+
+
+def test_compression_can_be_disabled(app, client, many_tasks):
+    app.config['COMPRESS_ENABLED'] = False
+    response = client.get('/api/tasks', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+
+from backend import reports
+
+
+def test_weekly_trend_buckets_and_deltas(db, add_session):
+    # 2024-01-08 is a Monday; the week before it is the leading period
+    add_session(datetime(2024, 1, 7, 10), 600)
+    add_session(datetime(2024, 1, 8, 0), 1200)
+    add_session(datetime(2024, 1, 14, 23, 30), 3600)
+    add_session(datetime(2024, 1, 16, 9), 300, is_break=True)
+
+    trend = reports.trend_report(db, 'week', 2, datetime(2024, 1, 17))
+    periods = trend['periods']
+    assert [p['label'] for p in periods] == ['2024-W02', '2024-W03']
+    assert [(p['start'], p['end']) for p in periods] == [('2024-01-08', '2024-01-15'),
+                                                        ('2024-01-15', '2024-01-22')]
+    # The session crossing Sunday midnight is split between the two weeks
+    assert [p['total_time'] for p in periods] == [3000, 1800]
+    assert [p['break_time'] for p in periods] == [0, 300]
+    assert [p['delta'] for p in periods] == [2400, -1200]
+    assert [p['delta_percent'] for p in periods] == [400.0, -40.0]
+
+
+def test_monthly_trend_crosses_year_boundary(db, add_session):
+    add_session(datetime(2023, 11, 30, 12), 100)
+    add_session(datetime(2023, 12, 31, 23, 0), 7200)
+    add_session(datetime(2024, 2, 29, 8), 60)
+
+    periods = reports.trend_report(db, 'month', 3, datetime(2024, 2, 10))['periods']
+    assert [p['label'] for p in periods] == ['2023-12', '2024-01', '2024-02']
+    assert periods[-1]['end'] == '2024-03-01'
+    assert [p['total_time'] for p in periods] == [3600, 3600, 60]
+    assert [p['session_count'] for p in periods] == [1, 0, 1]
+    assert periods[1]['delta_percent'] == 0.0
+
+
+def test_trend_without_previous_data_has_no_percentage(db, add_session):
+    add_session(datetime(2024, 3, 5, 9), 900)
+    period, = reports.trend_report(db, 'month', 1, datetime(2024, 3, 20))['periods']
+    assert period['delta'] == 900
+    assert period['delta_percent'] is None
+    assert period['tasks'] == [{'task_name': 'Writing', 'total_time': 900, 'session_count': 1}]
+
+
+@pytest.mark.parametrize('count', [0, -3, reports.MAX_TREND_PERIODS + 1])
+def test_trend_rejects_count_out_of_range(db, count):
+    with pytest.raises(ValueError):
+        reports.trend_report(db, 'week', count, datetime(2024, 3, 20))
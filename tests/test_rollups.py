@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from backend.models import Session
+from backend.rollups import rollup_rows, split_by_hour
+
+
+def rollup_state(db):
+    """Both rollup tables as sorted lists of rows."""
+    conn = sqlite3.connect(db.db_path)
+    try:
+        return {table: conn.execute(f'SELECT * FROM {table} ORDER BY 1, 2, 3').fetchall()
+                for table in ('rollup_hourly', 'rollup_daily')}
+    finally:
+        conn.close()
+
+
+def assert_matches_rebuild(db):
+    incremental = rollup_state(db)
+    db.rebuild_rollups()
+    assert rollup_state(db) == incremental
+
+
+def test_split_by_hour_within_one_hour():
+    assert split_by_hour(datetime(2024, 3, 1, 9, 10), 600) == [(datetime(2024, 3, 1, 9), 600)]
+
+
+def test_split_by_hour_across_midnight():
+    pieces = split_by_hour(datetime(2024, 12, 31, 23, 45), 1800)
+    assert pieces == [(datetime(2024, 12, 31, 23), 900), (datetime(2025, 1, 1, 0), 900)]
+
+
+def test_split_by_hour_keeps_total_with_fractional_start():
+    start = datetime(2024, 3, 1, 9, 59, 59, 600000)
+    pieces = split_by_hour(start, 7201)
+    assert sum(seconds for _, seconds in pieces) == 7201
+    assert [hour.hour for hour, _ in pieces] == [9, 10, 11, 12]
+
+
+def test_rollup_rows_credits_time_past_midnight_to_next_day():
+    hourly, daily = rollup_rows(7, datetime(2024, 1, 1, 23, 30), 3600, False)
+    assert hourly == [('2024-01-01T23:00', 7, 0, 1800, 1), ('2024-01-02T00:00', 7, 0, 1800, 0)]
+    assert daily == [('2024-01-01', 7, 0, 1800, 1), ('2024-01-02', 7, 0, 1800, 0)]
+
+
+def test_rollup_rows_negative_sign_and_empty_duration():
+    hourly, daily = rollup_rows(7, datetime(2024, 1, 1, 10), 60, True, sign=-1)
+    assert hourly == [('2024-01-01T10:00', 7, 1, -60, -1)]
+    assert daily == [('2024-01-01', 7, 1, -60, -1)]
+    assert rollup_rows(7, datetime(2024, 1, 1, 10), 0, False) == ([], [])
+
+
+def test_create_session_matches_rebuild(db, task_id, add_session):
+    add_session(datetime(2024, 1, 1, 23, 30), 5400)
+    add_session(datetime(2024, 1, 2, 8), 300, is_break=True)
+    assert rollup_state(db)['rollup_daily'] == [
+        ('2024-01-01', task_id, 0, 1800, 1),
+        ('2024-01-02', task_id, 0, 3600, 0),
+        ('2024-01-02', task_id, 1, 300, 1),
+    ]
+    assert_matches_rebuild(db)
+
+
+def test_start_stop_matches_rebuild(db, task_id):
+    start = datetime(2024, 5, 6, 10, 50)
+    session = db.start_session(task_id, start_time=start)
+    assert rollup_state(db)['rollup_hourly'] == []
+    db.stop_session(session.id, end_time=start + timedelta(minutes=25))
+    assert [row[3] for row in rollup_state(db)['rollup_hourly']] == [600, 900]
+    assert_matches_rebuild(db)
+
+
+def test_update_session_matches_rebuild(db, task_id, add_session):
+    session_id = add_session(datetime(2024, 5, 6, 10), 7200)
+    start = datetime(2024, 5, 6, 10)
+    db.update_session(Session(session_id, task_id, start, start + timedelta(minutes=30), 1800))
+    assert rollup_state(db)['rollup_hourly'] == [('2024-05-06T10:00', task_id, 0, 1800, 1)]
+    assert_matches_rebuild(db)
+
+
+def test_import_matches_rebuild(db, add_session):
+    add_session(datetime(2024, 2, 28, 22), 10800)
+    db.import_data(db.export_all_data())
+    assert_matches_rebuild(db)
+
+
+def test_archive_keeps_rollups_and_rebuild_reads_archives(db, add_session):
+    add_session(datetime(2020, 12, 31, 23), 7200)
+    add_session(datetime(2024, 1, 1, 9), 600)
+    before = rollup_state(db)
+    assert db.archive_sessions(datetime(2021, 6, 1)) == {2020: 1}
+    assert rollup_state(db) == before
+    assert_matches_rebuild(db)
+
+
+def test_daily_rollups_range_is_half_open(db, add_session):
+    add_session(datetime(2024, 1, 1, 12), 3 * 86400)
+    rows = db.get_daily_rollups(datetime(2024, 1, 2), datetime(2024, 1, 4))
+    assert [(row['bucket'], row['total_time']) for row in rows] == [
+        ('2024-01-02', 86400), ('2024-01-03', 86400)]
+
+
+def test_rebuild_does_not_lose_a_concurrent_stop(db, task_id):
+    db.start_session(task_id, start_time=datetime(2024, 5, 6, 9))
+    stopper = threading.Thread(target=db.stop_session,
+                               kwargs={'end_time': datetime(2024, 5, 6, 10)})
+    query_archives = db._query_archives
+
+    def stop_during_rebuild(*args, **kwargs):
+        # The stop has to wait for the rebuild's write lock
+        stopper.start()
+        stopper.join(0.5)
+        return query_archives(*args, **kwargs)
+
+    db._query_archives = stop_during_rebuild
+    db.rebuild_rollups()
+    stopper.join()
+    db._query_archives = query_archives
+
+    assert db.get_daily_rollups(datetime(2024, 5, 6), datetime(2024, 5, 7))[0]['total_time'] == 3600
+    assert db.get_active_session() is None
+    assert_matches_rebuild(db)
@@ -0,0 +1,82 @@
+import queue
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models import Task
+from backend.scheduler import TimeLimitScheduler
+
+
+@pytest.fixture
+def scheduler(db):
+    scheduler = TimeLimitScheduler(db)
+    scheduler.start()
+    yield scheduler
+    scheduler.stop()
+
+
+@pytest.fixture
+def events(scheduler):
+    subscriber = scheduler.subscribe()
+    yield subscriber
+    scheduler.unsubscribe(subscriber)
+
+
+def limited_task(db, time_limit):
+    return db.create_task(Task(id=None, name='Limited', time_limit=time_limit))
+
+
+def test_event_fires_at_the_deadline(db, scheduler, events):
+    task_id = limited_task(db, 1)
+    scheduler.set_task_limit(task_id, 1)
+    session = db.start_session(task_id)
+    scheduler.session_started(session)
+
+    event = events.get(timeout=5)
+    assert event['type'] == 'limit_reached'
+    assert (event['session_id'], event['task_id'], event['time_limit']) == (session.id, task_id, 1)
+    assert datetime.fromisoformat(event['fired_at']) >= session.start_time + timedelta(seconds=1)
+
+
+def test_stop_cancels_the_event(db, scheduler, events):
+    task_id = limited_task(db, 1)
+    scheduler.set_task_limit(task_id, 1)
+    scheduler.session_started(db.start_session(task_id))
+    scheduler.session_stopped(db.stop_session().id)
+
+    with pytest.raises(queue.Empty):
+        events.get(timeout=1.5)
+
+
+def test_stop_outside_the_api_is_noticed_at_the_deadline(db, scheduler, events):
+    task_id = limited_task(db, 1)
+    scheduler.set_task_limit(task_id, 1)
+    scheduler.session_started(db.start_session(task_id))
+    db.stop_session()  # as the command line does, without telling the scheduler
+
+    with pytest.raises(queue.Empty):
+        events.get(timeout=1.5)
+
+
+def test_adding_a_limit_to_a_running_task_schedules_it(db, scheduler, events, task_id):
+    session = db.start_session(task_id, start_time=datetime.now() - timedelta(seconds=5))
+    scheduler.session_started(session)
+    scheduler.set_task_limit(task_id, 1)
+
+    assert events.get(timeout=5)['session_id'] == session.id
+
+
+def test_bad_limit_is_ignored(db, scheduler, events, task_id):
+    scheduler.set_task_limit(task_id, 'sixty')
+    scheduler.session_started(db.start_session(task_id))
+    scheduler.set_task_limit(task_id, 1)
+
+    assert events.get(timeout=5)['task_id'] == task_id
+
+
+def test_api_rejects_bad_limit_and_still_starts(client):
+    task = client.post('/api/tasks', json={'name': 'Writing', 'time_limit': '60'}).get_json()
+    assert task['time_limit'] == 60
+    assert client.put(f"/api/tasks/{task['id']}", json={'time_limit': 'abc'}).status_code == 400
+    assert client.put(f"/api/tasks/{task['id']}", json={'time_limit': -1}).status_code == 400
+    assert client.post('/api/sessions/start', json={'task_id': task['id']}).status_code == 201
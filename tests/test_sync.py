@@ -0,0 +1,78 @@
+from datetime import datetime
+
+from backend.models import Task
+
+
+def upserted_ids(changes, table):
+    return sorted(row['id'] for row in changes[table]['upserted'])
+
+
+def test_since_zero_returns_full_snapshot(db, task_id, add_session):
+    add_session(datetime(2024, 1, 1, 9))
+    changes = db.get_changes_since(0)
+    assert changes['full']
+    assert upserted_ids(changes, 'tasks') == [task_id]
+    assert len(changes['sessions']['upserted']) == 1
+
+
+def test_reports_latest_change_per_row(db, add_session):
+    seq = db.get_changes_since(0)['seq']
+    session_id = add_session(datetime(2024, 1, 1, 9))
+    other_id = db.create_task(Task(id=None, name='Reading'))
+    db.delete_task(other_id)
+
+    changes = db.get_changes_since(seq)
+    assert not changes['full']
+    assert upserted_ids(changes, 'sessions') == [session_id]
+    assert changes['tasks'] == {'upserted': [], 'deleted': [other_id]}
+    assert db.get_changes_since(changes['seq'])['sessions'] == {'upserted': [], 'deleted': []}
+
+
+def test_compaction_keeps_changes_after_floor(db, task_id):
+    seq = db.get_changes_since(0)['seq']
+    session = db.start_session(task_id, start_time=datetime(2024, 1, 1, 9))
+    db.stop_session(session.id, end_time=datetime(2024, 1, 1, 10))
+
+    assert db.compact_change_log()['superseded'] == 1
+    changes = db.get_changes_since(seq)
+    assert not changes['full']
+    assert upserted_ids(changes, 'sessions') == [session.id]
+
+
+def test_truncation_raises_floor(db, add_session):
+    seq = db.get_changes_since(0)['seq']
+    for hour in range(5):
+        add_session(datetime(2024, 1, 1, hour))
+    latest = db.get_changes_since(seq)['seq']
+
+    assert db.compact_change_log(max_entries=2)['truncated'] == 4  # the task insert too
+    assert db.get_setting('change_log_floor') == str(latest - 2)
+    assert db.get_changes_since(seq)['full']
+    changes = db.get_changes_since(latest - 2)
+    assert not changes['full']
+    assert len(changes['sessions']['upserted']) == 2
+
+
+def test_archived_sessions_are_not_reported_deleted(db, add_session):
+    seq = db.get_changes_since(0)['seq']
+    session_id = add_session(datetime(2020, 6, 1, 9))
+    db.archive_sessions(datetime(2021, 1, 1))
+
+    changes = db.get_changes_since(seq)
+    assert changes['sessions']['deleted'] == []
+    assert upserted_ids(changes, 'sessions') == [session_id]
+
+
+def test_batched_compaction_matches_single_pass(db, task_id):
+    for hour in range(4):
+        session = db.start_session(task_id, start_time=datetime(2024, 1, 1, hour))
+        db.stop_session(session.id, end_time=datetime(2024, 1, 1, hour, 30))
+    latest = db.get_changes_since(0)['seq']
+
+    assert db.compact_change_log(max_entries=3, batch_size=2) == {'superseded': 4, 'truncated': 2}
+    floor = int(db.get_setting('change_log_floor'))
+    assert db.get_changes_since(floor - 1)['full']
+    changes = db.get_changes_since(floor)
+    assert not changes['full']
+    assert len(changes['sessions']['upserted']) == 3
+    assert changes['seq'] == latest